@@ -9,13 +9,24 @@ Designed to work with Cursor as the human interface.
 Tools:
   - tmux_list: List all agent sessions
   - tmux_spawn: Start a new agent in tmux
+  - tmux_spawn_batch: Start several agents, grouping ollama agents by model
   - tmux_kill: Stop an agent session
   - tmux_send: Send input to an agent
   - tmux_read: Read recent output from agent
   - tmux_attach_info: Get info for attaching to a session
-  - hivemind_status: Read .hivemind/STATUS.md
-  - hivemind_messages: Read .hivemind/MESSAGES.md
-  - hivemind_write_message: Write to MESSAGES.md
+  - hivemind_status: Query agent status (mirrored to .hivemind/STATUS.md)
+  - hivemind_messages: Query messages (mirrored to .hivemind/MESSAGES.md)
+  - hivemind_write_message: Write a message (re-renders MESSAGES.md)
+  - hivemind_usage: Bytes/approximate tokens sent to and read from each agent
+  - hivemind_ollama_status: Ollama backend health and loaded models
+  - hivemind_ollama_warm: Pre-load ollama models before spawning agents
+  - hivemind_save: Snapshot every agent's spawn settings, scrollback and pending messages
+  - hivemind_restore: Respawn a saved swarm in parallel
+  - hivemind_cache_put: Store a shared artifact once, referenced as {{blob:<hash>}}
+  - hivemind_cache_get: Fetch a shared artifact by hash
+  - hivemind_trace: Timeline of tool calls, tmux/git/ollama spans and agent replies
+  - hivemind_watch: Raise ALERT messages when agent output matches triggers
+  - hivemind_worktree_status: Summarize changes in every agent worktree
 
 Usage:
   python hivemind_mcp.py                    # stdio transport (local)
@@ -24,18 +35,45 @@ Usage:
 Environment Variables:
   HIVEMIND_PROJECT_DIR - Default project directory (defaults to cwd)
   HIVEMIND_TMUX_PREFIX - Prefix for tmux sessions (defaults to "hive")
+  HIVEMIND_POOL_MODE   - Park finished agents for reuse instead of killing them
+  HIVEMIND_POOL_SIZE   - Maximum number of parked agents (defaults to 4)
+  HIVEMIND_SEND_RATE   - Sends per minute allowed per agent (defaults to 6, 0 disables)
+  HIVEMIND_SEND_BURST  - Sends an agent may receive back-to-back (defaults to 3)
+  HIVEMIND_SEND_IDLE_SECONDS - Quiet time before an agent counts as idle (defaults to 3)
+  HIVEMIND_TOKEN_BUDGET - Cap on approximate tokens sent colony-wide (0 = unlimited)
+  OLLAMA_API_BASE      - Ollama server for ollama-backed agents (defaults to http://localhost:11434)
+  HIVEMIND_OLLAMA_KEEP_ALIVE - How long warmed models stay loaded (defaults to "30m")
+  HIVEMIND_OLLAMA_WARM_TIMEOUT - Seconds to wait for a model to load (defaults to 300)
+  HIVEMIND_CACHE_MAX_BYTES - Size cap of the shared context cache (defaults to 256 MiB)
+  HIVEMIND_TRACE       - Record tool-call spans to .hivemind/traces.jsonl (defaults to on)
+  HIVEMIND_TRACE_PROMPTS - Append [trace:<id>] to task prompts sent to agents (defaults to on)
 """
 
 import asyncio
+import atexit
+import contextvars
+import functools
+import gzip
+import hashlib
 import subprocess
 import json
+import logging
 import os
+import re
+import secrets
+import shlex
+import sqlite3
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Callable
 from enum import Enum
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -45,12 +83,32 @@ from pydantic import BaseModel, Field, ConfigDict
 
 DEFAULT_PROJECT_DIR = os.environ.get("HIVEMIND_PROJECT_DIR", os.getcwd())
 TMUX_PREFIX = os.environ.get("HIVEMIND_TMUX_PREFIX", "hive")
+# Parked agents live outside "<prefix>-" so dashboards and broadcasts skip them
+POOL_PREFIX = f"{TMUX_PREFIX}pool"
+POOL_MODE = os.environ.get("HIVEMIND_POOL_MODE", "").lower() in ("1", "true", "yes")
+POOL_SIZE = int(os.environ.get("HIVEMIND_POOL_SIZE", "4"))
+SEND_RATE_PER_MINUTE = float(os.environ.get("HIVEMIND_SEND_RATE", "6"))
+SEND_BURST = int(os.environ.get("HIVEMIND_SEND_BURST", "3"))
+SEND_IDLE_SECONDS = float(os.environ.get("HIVEMIND_SEND_IDLE_SECONDS", "3"))
+TOKEN_BUDGET = int(os.environ.get("HIVEMIND_TOKEN_BUDGET", "0"))
+OLLAMA_URL = os.environ.get("OLLAMA_API_BASE", "http://localhost:11434")
+OLLAMA_KEEP_ALIVE = os.environ.get("HIVEMIND_OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_WARM_TIMEOUT = float(os.environ.get("HIVEMIND_OLLAMA_WARM_TIMEOUT", "300"))
+# Loaded models take roughly their file size plus context buffers
+OLLAMA_MEMORY_OVERHEAD = 1.2
+CACHE_MAX_BYTES = int(os.environ.get("HIVEMIND_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+TRACE_ENABLED = os.environ.get("HIVEMIND_TRACE", "1").lower() not in ("0", "false", "no")
+TRACE_PROMPTS = os.environ.get("HIVEMIND_TRACE_PROMPTS", "1").lower() not in ("0", "false", "no")
+TRACE_MAX_BYTES = 50 * 1024 * 1024
+# Shorter sends are treated as interactive replies ("yes", "2") and not tagged
+TRACE_MIN_PROMPT_CHARS = 40
 
 # =============================================================================
 # Initialize MCP Server
 # =============================================================================
 
 mcp = FastMCP("hivemind_mcp")
+logger = logging.getLogger("hivemind")
 
 
 # =============================================================================
@@ -112,7 +170,8 @@ class TmuxSpawnInput(BaseModel):
     )
     initial_prompt: Optional[str] = Field(
         default=None,
-        description="Initial prompt/task to send to the agent after startup"
+        description="Initial prompt/task to send to the agent after startup. "
+                    "May reference cached blobs as {{blob:<hash>}}."
     )
     auto_accept: bool = Field(
         default=True,
@@ -130,6 +189,14 @@ class TmuxSpawnInput(BaseModel):
         default=None,
         description="Branch name for worktree (defaults to session name)"
     )
+    reuse_pooled: bool = Field(
+        default=True,
+        description="Claim a parked agent with the same program/model instead of starting a new one"
+    )
+    warm_backend: bool = Field(
+        default=True,
+        description="For ollama-backed agents, check the backend and load the model before starting"
+    )
 
 
 class TmuxKillInput(BaseModel):
@@ -144,6 +211,10 @@ class TmuxKillInput(BaseModel):
         default=False,
         description="Force kill without confirmation"
     )
+    park: bool = Field(
+        default=POOL_MODE,
+        description="Reset the agent and park it in the idle pool instead of killing it"
+    )
 
 
 class TmuxSendInput(BaseModel):
@@ -156,12 +227,32 @@ class TmuxSendInput(BaseModel):
     )
     text: str = Field(
         ...,
-        description="Text to send to the session"
+        description="Text to send to the session. May reference cached blobs as {{blob:<hash>}}."
+    )
+    inline_blobs: bool = Field(
+        default=False,
+        description="Paste referenced blob contents instead of their file paths"
     )
     press_enter: bool = Field(
         default=True,
         description="Press Enter after sending text"
     )
+    wait_for_idle: bool = Field(
+        default=False,
+        description="Only deliver once the agent's output has gone quiet"
+    )
+    queue: bool = Field(
+        default=True,
+        description="Queue the send when rate limited instead of returning an error"
+    )
+    trace_tag: Optional[bool] = Field(
+        default=None,
+        description=(
+            "Append [trace:<id>] so the agent's reply can be linked back. "
+            "By default only task-style prompts (40+ characters) are tagged; "
+            "short replies such as 'yes' are sent as typed."
+        )
+    )
 
 
 class TmuxReadInput(BaseModel):
@@ -198,6 +289,14 @@ class HivemindStatusInput(BaseModel):
         default=None,
         description="Project directory containing .hivemind/. Defaults to current project."
     )
+    agent: Optional[str] = Field(
+        default=None,
+        description="Only show this agent"
+    )
+    include_tasks: bool = Field(
+        default=False,
+        description="Include each agent's task history"
+    )
 
 
 class HivemindMessagesInput(BaseModel):
@@ -216,6 +315,12 @@ class HivemindMessagesInput(BaseModel):
         default=False,
         description="Only show active (unresolved) messages"
     )
+    limit: int = Field(
+        default=100,
+        description="Maximum number of messages to return, newest first",
+        ge=1,
+        le=1000
+    )
 
 
 class HivemindWriteMessageInput(BaseModel):
@@ -248,6 +353,360 @@ class HivemindWriteMessageInput(BaseModel):
     )
 
 
+class HivemindWatchInput(BaseModel):
+    """Input for controlling the output trigger engine."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    enabled: bool = Field(
+        default=True,
+        description="Start (true) or stop (false) watching agent output"
+    )
+    project_dir: Optional[str] = Field(
+        default=None,
+        description="Project directory where ALERT messages are written"
+    )
+    sessions: Optional[List[str]] = Field(
+        default=None,
+        description="Only watch these sessions. Defaults to every hivemind session."
+    )
+    triggers: Optional[Dict[str, str]] = Field(
+        default=None,
+        description="Extra trigger name -> regex pairs, merged over the defaults"
+    )
+    cooldown_seconds: int = Field(
+        default=60,
+        description="Minimum seconds between alerts for the same session and trigger",
+        ge=0,
+        le=3600
+    )
+    notify: bool = Field(
+        default=False,
+        description="Also emit an MCP log notification to this client on each match"
+    )
+
+
+class HivemindWorktreeStatusInput(BaseModel):
+    """Input for summarizing agent worktrees."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    project_dir: Optional[str] = Field(
+        default=None,
+        description="Git repository whose worktrees to inspect. Defaults to project root."
+    )
+    base_branch: Optional[str] = Field(
+        default=None,
+        description="Branch to compare against. Defaults to the main worktree's HEAD."
+    )
+    max_files: int = Field(
+        default=50,
+        description="Maximum changed files to list per worktree",
+        ge=0,
+        le=1000
+    )
+
+
+class HivemindUsageInput(BaseModel):
+    """Input for reading send/read accounting."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    name: Optional[str] = Field(
+        default=None,
+        description="Only report this session"
+    )
+    reset: bool = Field(
+        default=False,
+        description="Zero the counters after reporting them"
+    )
+
+
+class OllamaStatusInput(BaseModel):
+    """Input for checking the ollama backend."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    include_installed: bool = Field(
+        default=True,
+        description="Also list installed (pulled) models"
+    )
+
+
+class OllamaWarmInput(BaseModel):
+    """Input for pre-loading ollama models."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    models: List[str] = Field(
+        ...,
+        description="Models to load (e.g., 'ollama/codellama:13b' or 'llama3.2')",
+        min_length=1
+    )
+
+
+class TmuxSpawnBatchInput(BaseModel):
+    """Input for spawning several agents at once."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    agents: List[TmuxSpawnInput] = Field(
+        ...,
+        description="Agents to spawn",
+        min_length=1,
+        max_length=20
+    )
+
+
+class HivemindSaveInput(BaseModel):
+    """Input for saving a swarm snapshot."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    project_dir: Optional[str] = Field(
+        default=None,
+        description="Project directory containing .hivemind/"
+    )
+    path: Optional[str] = Field(
+        default=None,
+        description="Snapshot file. Defaults to .hivemind/snapshot.json.gz"
+    )
+    scrollback_lines: int = Field(
+        default=200,
+        description="Lines of each agent's scrollback to keep",
+        ge=0,
+        le=5000
+    )
+
+
+class HivemindRestoreInput(BaseModel):
+    """Input for restoring a swarm snapshot."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    project_dir: Optional[str] = Field(
+        default=None,
+        description="Project directory containing .hivemind/"
+    )
+    path: Optional[str] = Field(
+        default=None,
+        description="Snapshot file. Defaults to .hivemind/snapshot.json.gz"
+    )
+    only: Optional[List[str]] = Field(
+        default=None,
+        description="Only restore these agents"
+    )
+    resend_prompt: bool = Field(
+        default=False,
+        description="Send each agent its original initial prompt again"
+    )
+
+
+class HivemindCachePutInput(BaseModel):
+    """Input for storing a blob in the shared context cache."""
+    model_config = ConfigDict(str_strip_whitespace=False, extra='forbid')
+    
+    content: Optional[str] = Field(
+        default=None,
+        description="Text to store"
+    )
+    file_path: Optional[str] = Field(
+        default=None,
+        description="File to store instead of content (e.g., a spec or repo map)"
+    )
+
+
+class HivemindCacheGetInput(BaseModel):
+    """Input for fetching a blob from the shared context cache."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    blob_hash: str = Field(
+        ...,
+        description="Blob hash, or a unique prefix of at least 8 characters",
+        pattern=r"^[0-9a-f]{8,64}$"
+    )
+    max_bytes: int = Field(
+        default=100000,
+        description="Maximum bytes of content to return",
+        ge=0,
+        le=10_000_000
+    )
+
+
+class HivemindTraceInput(BaseModel):
+    """Input for reading the trace timeline."""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+    
+    trace_id: Optional[str] = Field(
+        default=None,
+        description="Show the full timeline of this trace (id or prefix)"
+    )
+    agent: Optional[str] = Field(
+        default=None,
+        description="Only list traces of tool calls targeting this agent"
+    )
+    limit: int = Field(
+        default=20,
+        description="Maximum number of traces to list",
+        ge=1,
+        le=500
+    )
+
+
+# =============================================================================
+# Tracing
+# =============================================================================
+#
+# Every tool call opens a trace. Nested work (tmux commands, ollama calls,
+# nested tool calls) is recorded as child spans of it. Spans are appended to
+# .hivemind/traces.jsonl, one OTLP/JSON ExportTraceServiceRequest per line, so
+# the file can be fed to an OpenTelemetry collector's otlpjsonfile receiver.
+# The trace id is also stamped on written messages and sent prompts so agent
+# replies can be tied back to the call that assigned the work.
+
+_TRACE_TAG = re.compile(r"\[trace:([0-9a-f]{32})\]")
+
+_current_span: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "hivemind_span", default=None
+)
+
+
+def _trace_path() -> Path:
+    return _hivemind_dir(DEFAULT_PROJECT_DIR) / "traces.jsonl"
+
+
+def _current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span["traceId"] if span else None
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _export_span(span: Dict[str, Any]) -> None:
+    """Append a finished span to the trace file."""
+    if not TRACE_ENABLED:
+        return
+    record = {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": "hivemind_mcp"}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}}
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "hivemind_mcp"},
+                "spans": [{
+                    **{k: v for k, v in span.items() if k != "attrs"},
+                    "attributes": [
+                        {"key": k, "value": _otlp_value(v)} for k, v in span["attrs"].items()
+                    ]
+                }]
+            }]
+        }]
+    }
+    path = _trace_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and path.stat().st_size > TRACE_MAX_BYTES:
+            os.replace(path, path.with_suffix(".jsonl.1"))
+        # Single O_APPEND write per span keeps lines intact across processes
+        with open(path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    except OSError:
+        pass
+
+
+@contextmanager
+def _span(name: str, root: bool = False, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Record a span under the current one.
+    
+    With root=True a new trace is started when none is active. Otherwise
+    nothing is recorded outside a trace, so background loops stay quiet.
+    """
+    parent = _current_span.get()
+    if parent is None and not root:
+        yield {"attrs": {}}
+        return
+    
+    span = {
+        "traceId": parent["traceId"] if parent else secrets.token_hex(16),
+        "spanId": secrets.token_hex(8),
+        "parentSpanId": parent["spanId"] if parent else "",
+        "name": name,
+        "kind": 1,
+        "startTimeUnixNano": str(time.time_ns()),
+        "attrs": {k: v for k, v in attrs.items() if v is not None},
+        "status": {"code": 1}
+    }
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span["status"] = {"code": 2, "message": str(e)}
+        raise
+    finally:
+        _current_span.reset(token)
+        span["endTimeUnixNano"] = str(time.time_ns())
+        _export_span(span)
+
+
+def _record_event_span(trace_id: str, name: str, at_ns: int, **attrs: Any) -> None:
+    """Record an instantaneous span in an existing trace (e.g. an agent reply)."""
+    _export_span({
+        "traceId": trace_id,
+        "spanId": secrets.token_hex(8),
+        "parentSpanId": "",
+        "name": name,
+        "kind": 1,
+        "startTimeUnixNano": str(at_ns),
+        "endTimeUnixNano": str(at_ns),
+        "attrs": attrs,
+        "status": {"code": 1}
+    })
+
+
+def _tag_prompt(text: str, program: Optional[str], force: Optional[bool] = None) -> str:
+    """Append the current trace id to a task prompt so replies can quote it.
+    
+    Only task-style prompts are tagged: short interactive replies, custom
+    programs (often shells) and agent slash/shell commands such as /add or
+    !ls are left untouched, since the tag would change their meaning.
+    force=True tags any non-command text, force=False never tags.
+    """
+    trace_id = _current_trace_id()
+    if not (TRACE_ENABLED and TRACE_PROMPTS and trace_id) or force is False:
+        return text
+    if not text.strip() or text.lstrip().startswith(("/", "!")):
+        return text
+    if not force and (
+        len(text.strip()) < TRACE_MIN_PROMPT_CHARS
+        or program in (None, "", AgentProgram.CUSTOM.value)
+    ):
+        return text
+    return f"{text} [trace:{trace_id}]"
+
+
+def traced(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Run a tool inside a trace span named after it."""
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> str:
+        params = kwargs.get("params", args[0] if args else None)
+        with _span(
+            f"tool {fn.__name__}",
+            root=True,
+            **{"hivemind.tool": fn.__name__, "hivemind.agent": getattr(params, "name", None)}
+        ) as span:
+            result = await fn(*args, **kwargs)
+            if isinstance(result, str) and result.lstrip().startswith("{") and '"error"' in result:
+                try:
+                    error = json.loads(result).get("error")
+                except ValueError:
+                    error = None
+                if error:
+                    span["status"] = {"code": 2, "message": str(error)}
+            return result
+    return wrapper
+
+
 # =============================================================================
 # Helper Functions
 # =============================================================================
@@ -255,12 +714,17 @@ class HivemindWriteMessageInput(BaseModel):
 def _run_tmux_command(args: List[str]) -> subprocess.CompletedProcess:
     """Run a tmux command and return the result."""
     cmd = ["tmux"] + args
-    return subprocess.run(cmd, capture_output=True, text=True)
+    with _span(f"tmux {args[0]}", **{"tmux.target": _tmux_target(args)}):
+        return subprocess.run(cmd, capture_output=True, text=True)
+
+
+def _tmux_target(args: List[str]) -> Optional[str]:
+    return args[args.index("-t") + 1] if "-t" in args[:-1] else None
 
 
 def _get_session_name(name: str) -> str:
     """Get the full session name with prefix."""
-    if name.startswith(f"{TMUX_PREFIX}-"):
+    if name.startswith((f"{TMUX_PREFIX}-", f"{POOL_PREFIX}-")):
         return name
     return f"{TMUX_PREFIX}-{name}"
 
@@ -295,7 +759,7 @@ def _build_agent_command(params: TmuxSpawnInput) -> str:
     if params.program == AgentProgram.OLLAMA:
         # For ollama, we typically use aider with ollama backend
         cmd_parts = ["aider"]
-        model = params.model or "ollama/codellama:13b"
+        model = params.model or AgentModel.OLLAMA_CODELLAMA.value
         cmd_parts.extend(["--model", model])
         if params.auto_accept:
             cmd_parts.append("--yes")
@@ -311,8 +775,20 @@ def _create_worktree(working_dir: str, branch_name: str) -> str:
     
     worktree_path = os.path.join(worktree_base, branch_name)
     
-    if os.path.exists(worktree_path):
-        return worktree_path
+    # A pooled agent claimed under another name keeps its directory but moves
+    # to that agent's branch; don't hand the same worktree to a second agent
+    n = 1
+    while os.path.exists(worktree_path):
+        current = subprocess.run(
+            ["git", "branch", "--show-current"],
+            cwd=worktree_path,
+            capture_output=True,
+            text=True
+        )
+        if current.returncode != 0 or current.stdout.strip() == f"squad/{branch_name}":
+            return worktree_path
+        n += 1
+        worktree_path = os.path.join(worktree_base, f"{branch_name}-{n}")
     
     # Create the worktree
     result = subprocess.run(
@@ -336,492 +812,3059 @@ def _create_worktree(working_dir: str, branch_name: str) -> str:
     return worktree_path
 
 
-# =============================================================================
-# tmux Tools
-# =============================================================================
+# Caps concurrent git processes when many worktrees are inspected at once
+GIT_CONCURRENCY = 8
+_git_slots = asyncio.Semaphore(GIT_CONCURRENCY)
+
+
+async def _run_git_async(cwd: str, *args: str) -> subprocess.CompletedProcess:
+    """Run a git command without blocking the event loop."""
+    async with _git_slots:
+        with _span(f"git {args[0]}", **{"git.cwd": cwd}):
+            proc = await asyncio.create_subprocess_exec(
+                "git", *args,
+                cwd=cwd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await proc.communicate()
+    return subprocess.CompletedProcess(
+        ["git", *args],
+        proc.returncode,
+        stdout.decode("utf-8", "replace"),
+        stderr.decode("utf-8", "replace")
+    )
 
-@mcp.tool(
-    name="tmux_list",
-    annotations={
-        "title": "List Agent Sessions",
-        "readOnlyHint": True,
-        "destructiveHint": False,
-        "idempotentHint": True,
-        "openWorldHint": False
-    }
-)
-async def tmux_list(params: TmuxListInput) -> str:
-    """List all hivemind agent tmux sessions.
-    
-    Returns information about running agent sessions including:
-    - Session name
-    - Status (attached/detached)
-    - Working directory
-    - Program running
-    
-    Args:
-        params: Filter options for listing sessions
-        
-    Returns:
-        JSON list of session information
-    """
-    result = _run_tmux_command([
-        "list-sessions",
-        "-F",
-        "#{session_name}|#{session_attached}|#{session_path}|#{session_created}"
-    ])
-    
+
+def _list_worktrees(repo_dir: str) -> List[Dict[str, str]]:
+    """Parse `git worktree list --porcelain` into path/head/branch dicts."""
+    result = subprocess.run(
+        ["git", "worktree", "list", "--porcelain"],
+        cwd=repo_dir,
+        capture_output=True,
+        text=True
+    )
     if result.returncode != 0:
-        if "no server running" in result.stderr or "no sessions" in result.stderr:
-            return json.dumps({"sessions": [], "count": 0})
-        return json.dumps({"error": f"Failed to list sessions: {result.stderr}"})
-    
-    sessions = []
-    prefix = params.filter_prefix or TMUX_PREFIX
-    
-    for line in result.stdout.strip().split("\n"):
-        if not line:
-            continue
-        parts = line.split("|")
-        if len(parts) >= 4:
-            name = parts[0]
-            if prefix and not name.startswith(prefix):
-                continue
-            
-            sessions.append({
-                "name": name,
-                "short_name": name.replace(f"{TMUX_PREFIX}-", ""),
-                "attached": parts[1] == "1",
-                "path": parts[2],
-                "created": parts[3]
+        raise RuntimeError(f"Failed to list worktrees: {result.stderr.strip()}")
+    
+    worktrees = []
+    for block in result.stdout.strip().split("\n\n"):
+        entry: Dict[str, str] = {}
+        for line in block.splitlines():
+            key, _, value = line.partition(" ")
+            entry[key] = value
+        if "worktree" in entry:
+            worktrees.append({
+                "path": entry["worktree"],
+                "head": entry.get("HEAD", ""),
+                "branch": entry.get("branch", "").replace("refs/heads/", ""),
+                "detached": "detached" in entry,
+                "bare": "bare" in entry,
+                # Directory was deleted without `git worktree remove`
+                "prunable": "prunable" in entry
             })
-    
-    return json.dumps({
-        "sessions": sessions,
-        "count": len(sessions)
-    }, indent=2)
+    return worktrees
 
 
-@mcp.tool(
-    name="tmux_spawn",
-    annotations={
-        "title": "Spawn New Agent",
-        "readOnlyHint": False,
-        "destructiveHint": False,
-        "idempotentHint": False,
-        "openWorldHint": True
-    }
-)
-async def tmux_spawn(params: TmuxSpawnInput) -> str:
-    """Spawn a new AI agent in a tmux session.
-    
-    Creates a new tmux session running the specified agent program.
-    Supports aider, claude code CLI, and ollama-backed agents.
+# Committed-side worktree summaries per repo, keyed by path; reused while HEAD and base are unchanged
+_worktree_cache: Dict[str, Dict[str, tuple]] = {}
+
+
+async def _summarize_worktree(
+    worktree: Dict[str, str],
+    base_ref: str,
+    base_sha: str,
+    max_files: int,
+    cache: Dict[str, tuple]
+) -> Dict[str, Any]:
+    """Compute ahead/behind, changed files, diffstat and mergeability.
     
-    Args:
-        params: Configuration for the new agent session
-        
-    Returns:
-        JSON with session info and status
+    Everything but the uncommitted list depends only on HEAD and the base
+    commit, so that part is cached; git status runs on every call since
+    working-tree edits don't move either.
     """
-    session_name = _get_session_name(params.name)
-    
-    # Check if session already exists
-    if _session_exists(session_name):
-        return json.dumps({
-            "error": f"Session '{session_name}' already exists",
-            "suggestion": "Use tmux_kill first or choose a different name"
-        })
-    
-    # Determine working directory
-    working_dir = params.working_dir or DEFAULT_PROJECT_DIR
+    path = worktree["path"]
+    head = worktree["head"]
+    if worktree["prunable"] or not os.path.isdir(path):
+        return {
+            "path": path,
+            "branch": worktree["branch"] or None,
+            "head": head[:12],
+            "base": base_ref,
+            "error": "Worktree directory is missing; run `git worktree prune`",
+        }
     
-    # Create worktree if requested
-    if params.use_worktree:
-        branch_name = params.branch_name or params.name
-        try:
-            working_dir = _create_worktree(working_dir, branch_name)
-        except RuntimeError as e:
-            return json.dumps({"error": str(e)})
+    key = (head, base_sha)
+    cached = cache.get(path)
+    if cached and cached[0] == key:
+        dirty = await _run_git_async(path, "status", "--porcelain")
+        return _worktree_result(cached[1], dirty, max_files, cached=True)
+    
+    counts, names, shortstat, dirty, merge = await asyncio.gather(
+        _run_git_async(path, "rev-list", "--left-right", "--count", f"{base_sha}...{head}"),
+        _run_git_async(path, "diff", "--name-status", f"{base_sha}...{head}"),
+        _run_git_async(path, "diff", "--shortstat", f"{base_sha}...{head}"),
+        _run_git_async(path, "status", "--porcelain"),
+        _run_git_async(path, "merge-tree", "--write-tree", "--name-only", base_sha, head)
+    )
     
-    # Build the agent command
-    try:
-        agent_cmd = _build_agent_command(params)
+    behind, ahead = 0, 0
+    if counts.returncode == 0 and counts.stdout.split():
+        behind, ahead = (int(n) for n in counts.stdout.split())
+    
+    changed = []
+    for line in names.stdout.splitlines():
+        status, _, name = line.partition("\t")
+        changed.append({"status": status, "file": name})
+    
+    # merge-tree exits 0 when clean, 1 on conflicts; older git lacks --write-tree
+    if merge.returncode == 0:
+        merges_cleanly: Optional[bool] = True
+        conflicts: List[str] = []
+    elif merge.returncode == 1:
+        merges_cleanly = False
+        conflicts = [
+            line for line in merge.stdout.split("\n\n")[0].splitlines()[1:] if line
+        ]
+    else:
+        merges_cleanly = None
+        conflicts = []
+    
+    summary = {
+        "path": path,
+        "branch": worktree["branch"] or None,
+        "head": head[:12],
+        "base": base_ref,
+        "ahead": ahead,
+        "behind": behind,
+        "files_changed": len(changed),
+        "changed_files": changed,
+        "diffstat": shortstat.stdout.strip(),
+        "merges_cleanly": merges_cleanly,
+        "conflicts": conflicts,
+    }
+    cache[path] = (key, summary)
+    return _worktree_result(summary, dirty, max_files, cached=False)
+
+
+def _worktree_result(
+    summary: Dict[str, Any],
+    dirty: subprocess.CompletedProcess,
+    max_files: int,
+    cached: bool
+) -> Dict[str, Any]:
+    """Combine a cached summary with fresh git status output."""
+    return {
+        **summary,
+        "changed_files": summary["changed_files"][:max_files],
+        "uncommitted": [line for line in dirty.stdout.splitlines() if line],
+        "cached": cached,
+    }
+
+
+# =============================================================================
+# Colony State Store
+# =============================================================================
+#
+# Messages, agent status, spawn records and task history live in
+# .hivemind/hivemind.db (SQLite, WAL mode) so several server processes can
+# share them. STATUS.md and MESSAGES.md are rendered from the database as
+# views for humans. Agents still edit those files directly. When a file has
+# changed since it was last rendered it is parsed back in, and the file wins.
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    sender TEXT NOT NULL COLLATE NOCASE,
+    recipient TEXT NOT NULL COLLATE NOCASE,
+    message_type TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ACTIVE',
+    trace_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender);
+CREATE INDEX IF NOT EXISTS idx_messages_recipient ON messages(recipient);
+CREATE INDEX IF NOT EXISTS idx_messages_status ON messages(status, id);
+CREATE INDEX IF NOT EXISTS idx_messages_trace ON messages(trace_id);
+
+CREATE TABLE IF NOT EXISTS agent_status (
+    agent TEXT PRIMARY KEY COLLATE NOCASE,
+    status TEXT,
+    fields TEXT NOT NULL DEFAULT '{}',
+    notes TEXT NOT NULL DEFAULT '',
+    position INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agent_status_status ON agent_status(status);
+
+CREATE TABLE IF NOT EXISTS spawns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT NOT NULL,
+    agent TEXT NOT NULL COLLATE NOCASE,
+    program TEXT NOT NULL,
+    model TEXT,
+    working_dir TEXT NOT NULL,
+    repo_dir TEXT NOT NULL,
+    worktree INTEGER NOT NULL DEFAULT 0,
+    branch TEXT,
+    initial_prompt TEXT,
+    reused_from TEXT,
+    created_at TEXT NOT NULL,
+    ended_at TEXT,
+    end_reason TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_spawns_session ON spawns(session, ended_at);
+CREATE INDEX IF NOT EXISTS idx_spawns_agent ON spawns(agent);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent TEXT NOT NULL COLLATE NOCASE,
+    task TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ASSIGNED',
+    assigned_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_agent ON tasks(agent, status);
+
+CREATE TABLE IF NOT EXISTS usage (
+    session TEXT PRIMARY KEY,
+    sends INTEGER NOT NULL DEFAULT 0,
+    reads INTEGER NOT NULL DEFAULT 0,
+    bytes_sent INTEGER NOT NULL DEFAULT 0,
+    bytes_read INTEGER NOT NULL DEFAULT 0,
+    tokens_sent INTEGER NOT NULL DEFAULT 0,
+    tokens_read INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_MESSAGE_ENTRY = re.compile(
+    r"^### \[(?P<timestamp>[^\]]*)\] (?P<sender>.+?)→(?P<recipient>.+?) \| (?P<type>[^\n|]*?)"
+    r"(?: \| trace:(?P<trace>[0-9a-f]{32}))?[ \t]*\n"
+    r"\*\*Subject:\*\* (?P<subject>[^\n]*)\n(?P<body>.*?)\n---[ \t]*$"
+    # Bodies may contain their own --- rules; only the one before the next entry ends it
+    r"(?=\s*(?:^### \[|^## |^# BROADCAST \[|\Z))",
+    re.MULTILINE | re.DOTALL
+)
+# Entries appended by the filesystem connector (## [ts]) and dashboard broadcasts
+_OTHER_ENTRY = re.compile(
+    r"^(?P<heading>## |# BROADCAST )\[(?P<timestamp>[^\]\n]*)\][ \t]*\n(?P<body>.*?)"
+    r"(?=^## \[|^# BROADCAST \[|\Z)",
+    re.MULTILINE | re.DOTALL
+)
+_MESSAGES_SECTION = re.compile(r"^## (ACTIVE|RESOLVED)[ \t]*$", re.MULTILINE)
+_STATUS_FIELD = re.compile(r"^(?P<key>[A-Za-z][\w \-]*?):\s*(?P<value>.*)$")
+_DONE_STATUSES = ("COMPLETE", "COMPLETED", "DONE")
+
+# Databases whose schema has been created by this process
+_store_ready: set = set()
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _hivemind_dir(project_dir: str) -> Path:
+    return Path(project_dir) / ".hivemind"
+
+
+def _file_stamp(path: Path) -> str:
+    """Identify a file version by mtime and size ('' when missing)."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return ""
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _meta_get(conn: sqlite3.Connection, key: str, default: str = "") -> str:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def _meta_set(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value)
+    )
+
+
+def _parse_messages_md(text: str) -> tuple:
+    """Split MESSAGES.md into (messages, text that isn't a message).
+    
+    Other writers append their own entry formats, so anything between
+    messages is kept as an extra block anchored to its section and to the
+    index of the message it follows (None for the start of the section).
+    """
+    messages: List[Dict[str, Any]] = []
+    extras: List[Dict[str, Any]] = []
+    
+    def keep(section: str, after: Optional[int], chunk: str) -> None:
+        chunk = re.sub(r"^# MESSAGES[ \t]*$", "", chunk, flags=re.MULTILINE).strip()
+        if chunk:
+            extras.append({"section": section, "after": after, "text": chunk})
+    
+    parts = _MESSAGES_SECTION.split(text)
+    keep("", None, parts[0])
+    for section, body in zip(parts[1::2], parts[2::2]):
+        after: Optional[int] = None
+        pos = 0
+        for m in _MESSAGE_ENTRY.finditer(body):
+            keep(section, after, body[pos:m.start()])
+            pos = m.end()
+            after = len(messages)
+            messages.append({
+                "timestamp": m["timestamp"],
+                "sender": m["sender"].strip(),
+                "recipient": m["recipient"].strip(),
+                "message_type": m["type"].strip(),
+                "subject": m["subject"].strip(),
+                "body": m["body"].strip(),
+                "status": section,
+                "trace_id": m["trace"] or _trace_in(m["body"]),
+            })
+        keep(section, after, body[pos:])
+    return messages, extras
+
+
+def _messages_extras(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Load the non-message blocks of MESSAGES.md with their anchors."""
+    raw = _meta_get(conn, "messages_extra")
+    try:
+        extras = json.loads(raw) if raw else []
+    except ValueError:
+        extras = None
+    if not isinstance(extras, list):
+        # Stores written before anchoring kept one block above ## ACTIVE
+        extras = [{"section": "", "after": None, "text": raw}]
+    return extras
+
+
+def _split_other_entries(extras: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Break extra blocks into connector/broadcast entries and plain text."""
+    entries = []
+    for extra in extras:
+        text = extra["text"]
+        pos = 0
+        for m in _OTHER_ENTRY.finditer(text):
+            if text[pos:m.start()].strip():
+                entries.append({"format": "text", "section": extra["section"] or None,
+                                "timestamp": None, "body": text[pos:m.start()].strip()})
+            entries.append({
+                "format": "broadcast" if m["heading"] == "# BROADCAST " else "connector",
+                "section": extra["section"] or None,
+                "timestamp": m["timestamp"],
+                "body": m["body"].strip(),
+            })
+            pos = m.end()
+        if text[pos:].strip():
+            entries.append({"format": "text", "section": extra["section"] or None,
+                            "timestamp": None, "body": text[pos:].strip()})
+    return entries
+
+
+def _trace_in(text: str) -> Optional[str]:
+    """Find a [trace:<id>] tag an agent copied from its prompt into a message."""
+    match = _TRACE_TAG.search(text)
+    return match.group(1) if match else None
+
+
+def _parse_status_md(text: str) -> tuple:
+    """Split STATUS.md into (agent sections, preamble before the first section)."""
+    parts = re.split(r"^## +(.+?)[ \t]*$", text, flags=re.MULTILINE)
+    preamble = re.sub(r"^# STATUS[ \t]*$", "", parts[0], flags=re.MULTILINE).strip()
+    agents = []
+    for name, body in zip(parts[1::2], parts[2::2]):
+        fields: Dict[str, str] = {}
+        notes = []
+        for line in body.strip().splitlines():
+            m = _STATUS_FIELD.match(line)
+            if m and not notes:
+                fields[m["key"]] = m["value"].strip()
+            else:
+                notes.append(line)
+        agents.append({"agent": name.strip(), "fields": fields, "notes": "\n".join(notes).strip()})
+    return agents, preamble
+
+
+def _sync_messages_md(conn: sqlite3.Connection, path: Path, keep_after: Optional[int] = None) -> None:
+    """Make the messages table match an externally edited MESSAGES.md.
+    
+    Rows with ids above keep_after were added by the current transaction
+    and are kept even though the file doesn't have them yet.
+    """
+    messages, extras = _parse_messages_md(path.read_text())
+    query = "SELECT id, timestamp, sender, recipient, message_type, subject, body FROM messages"
+    args: tuple = ()
+    if keep_after is not None:
+        query += " WHERE id <= ?"
+        args = (keep_after,)
+    existing: Dict[tuple, List[int]] = {}
+    for row in conn.execute(query, args):
+        existing.setdefault(tuple(row[1:]), []).append(row[0])
+    
+    # Sections list newest first, so insert bottom-up to keep ids chronological
+    message_ids: List[int] = [0] * len(messages)
+    for index in reversed(range(len(messages))):
+        msg = messages[index]
+        key = (msg["timestamp"], msg["sender"], msg["recipient"],
+               msg["message_type"], msg["subject"], msg["body"])
+        ids = existing.get(key)
+        if ids:
+            message_ids[index] = ids.pop(0)
+            conn.execute("UPDATE messages SET status = ? WHERE id = ?", (msg["status"], message_ids[index]))
+        else:
+            cursor = conn.execute(
+                "INSERT INTO messages (timestamp, sender, recipient, message_type, subject, body, "
+                "status, trace_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, msg["status"], msg["trace_id"])
+            )
+            message_ids[index] = cursor.lastrowid
+            if msg["trace_id"]:
+                # The file's mtime is when the agent wrote its reply
+                _record_event_span(
+                    msg["trace_id"], "message.received", path.stat().st_mtime_ns,
+                    **{"hivemind.agent": msg["sender"], "message.type": msg["message_type"],
+                       "message.subject": msg["subject"]}
+                )
+    
+    # Entries left over were removed from the file by whoever edited it
+    conn.executemany(
+        "DELETE FROM messages WHERE id = ?",
+        [(i,) for ids in existing.values() for i in ids]
+    )
+    for extra in extras:
+        if extra["after"] is not None:
+            extra["after"] = message_ids[extra["after"]]
+    _meta_set(conn, "messages_extra", json.dumps(extras))
+
+
+def _sync_status_md(conn: sqlite3.Connection, path: Path) -> None:
+    """Make the agent_status table match an externally edited STATUS.md."""
+    agents, preamble = _parse_status_md(path.read_text())
+    now = _now()
+    conn.execute("DELETE FROM agent_status")
+    for position, entry in enumerate(agents):
+        status = entry["fields"].get("Status", "")
+        conn.execute(
+            "INSERT OR REPLACE INTO agent_status (agent, status, fields, notes, position, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (entry["agent"], status, json.dumps(entry["fields"]), entry["notes"], position, now)
+        )
+        if status.upper() in _DONE_STATUSES:
+            conn.execute(
+                "UPDATE tasks SET status = 'COMPLETE', finished_at = ? "
+                "WHERE agent = ? AND status = 'ASSIGNED'",
+                (now, entry["agent"])
+            )
+    _meta_set(conn, "status_preamble", preamble)
+
+
+def _format_message(row: sqlite3.Row) -> str:
+    trace = f" | trace:{row['trace_id']}" if row["trace_id"] else ""
+    return (
+        f"\n### [{row['timestamp']}] {row['sender']}→{row['recipient']} | {row['message_type']}{trace}\n"
+        f"**Subject:** {row['subject']}\n\n{row['body']}\n\n---\n"
+    )
+
+
+def _render_messages_md(conn: sqlite3.Connection) -> str:
+    anchored: Dict[tuple, List[str]] = {}
+    for extra in _messages_extras(conn):
+        anchored.setdefault((extra["section"], extra["after"]), []).append(f"\n{extra['text']}\n")
+    
+    out = ["# MESSAGES\n", *anchored.pop(("", None), [])]
+    for status in ("ACTIVE", "RESOLVED"):
+        out.append(f"\n## {status}\n")
+        out += anchored.pop((status, None), [])
+        # Newest first, matching the original insert-under-header layout
+        for row in conn.execute(
+            "SELECT * FROM messages WHERE status = ? ORDER BY id DESC", (status,)
+        ):
+            out.append(_format_message(row))
+            out += anchored.pop((status, row["id"]), [])
+        # Blocks whose message was resolved or removed stay in their section
+        for key in [k for k in anchored if k[0] == status]:
+            out += anchored.pop(key)
+    for blocks in anchored.values():
+        out += blocks
+    return "".join(out)
+
+
+def _render_status_md(conn: sqlite3.Connection) -> str:
+    preamble = _meta_get(conn, "status_preamble")
+    out = ["# STATUS\n"]
+    if preamble:
+        out.append(f"\n{preamble}\n")
+    for row in conn.execute("SELECT * FROM agent_status ORDER BY position, agent"):
+        out.append(f"\n## {row['agent']}\n")
+        for key, value in json.loads(row["fields"]).items():
+            out.append(f"{key}: {value}\n")
+        if row["notes"]:
+            out.append(f"{row['notes']}\n")
+    return "".join(out)
+
+
+_MARKDOWN_VIEWS = (
+    ("MESSAGES.md", _sync_messages_md, _render_messages_md),
+    ("STATUS.md", _sync_status_md, _render_status_md),
+)
+
+
+def _markdown_changed(conn: sqlite3.Connection, project_dir: str) -> bool:
+    hm_dir = _hivemind_dir(project_dir)
+    return any(
+        _file_stamp(hm_dir / name) not in ("", _meta_get(conn, f"stamp:{name}"))
+        for name, _, _ in _MARKDOWN_VIEWS
+    )
+
+
+def _sync_markdown(conn: sqlite3.Connection, project_dir: str) -> None:
+    """Import any view that was edited since it was last rendered."""
+    hm_dir = _hivemind_dir(project_dir)
+    for name, sync, _ in _MARKDOWN_VIEWS:
+        path = hm_dir / name
+        stamp = _file_stamp(path)
+        if stamp and stamp != _meta_get(conn, f"stamp:{name}"):
+            sync(conn, path)
+            _meta_set(conn, f"stamp:{name}", stamp)
+
+
+def _view_marks(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Capture the view tables after import, to tell this transaction's changes apart."""
+    return {
+        "messages": conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0],
+        "status": {row["agent"].lower(): tuple(row) for row in conn.execute("SELECT * FROM agent_status")},
+    }
+
+
+def _resync_markdown(conn: sqlite3.Connection, project_dir: str, marks: Dict[str, Any]) -> None:
+    """Import views edited while the transaction ran, keeping its own changes.
+    
+    Called right before rendering, so an agent's edit made between the
+    initial import and the re-render isn't overwritten.
+    """
+    hm_dir = _hivemind_dir(project_dir)
+    messages_path = hm_dir / "MESSAGES.md"
+    stamp = _file_stamp(messages_path)
+    if stamp and stamp != _meta_get(conn, "stamp:MESSAGES.md"):
+        _sync_messages_md(conn, messages_path, keep_after=marks["messages"])
+    
+    status_path = hm_dir / "STATUS.md"
+    stamp = _file_stamp(status_path)
+    if not stamp or stamp == _meta_get(conn, "stamp:STATUS.md"):
+        return
+    ours = [
+        dict(row) for row in conn.execute("SELECT * FROM agent_status")
+        if marks["status"].get(row["agent"].lower()) != tuple(row)
+    ]
+    _sync_status_md(conn, status_path)
+    for row in ours:
+        edited = conn.execute(
+            "SELECT fields FROM agent_status WHERE agent = ?", (row["agent"],)
+        ).fetchone()
+        fields = json.loads(edited["fields"]) if edited else {}
+        fields.update(json.loads(row["fields"]))
+        conn.execute(
+            "INSERT INTO agent_status (agent, status, fields, notes, position, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(agent) DO UPDATE SET status = excluded.status, "
+            "fields = excluded.fields, updated_at = excluded.updated_at",
+            (row["agent"], row["status"], json.dumps(fields), row["notes"],
+             row["position"], row["updated_at"])
+        )
+
+
+def _render_markdown(conn: sqlite3.Connection, project_dir: str) -> None:
+    """Regenerate the markdown views from the database."""
+    hm_dir = _hivemind_dir(project_dir)
+    for name, _, render in _MARKDOWN_VIEWS:
+        path = hm_dir / name
+        if name == "STATUS.md" and not path.exists():
+            if conn.execute("SELECT 1 FROM agent_status LIMIT 1").fetchone() is None:
+                continue
+        tmp = path.with_name(f".{name}.{os.getpid()}.tmp")
+        tmp.write_text(render(conn))
+        os.replace(tmp, path)
+        _meta_set(conn, f"stamp:{name}", _file_stamp(path))
+
+
+def _migrate_store(conn: sqlite3.Connection) -> None:
+    """Add columns introduced after a database was first created."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+    if columns and "trace_id" not in columns:
+        conn.execute("ALTER TABLE messages ADD COLUMN trace_id TEXT")
+
+
+@contextmanager
+def _open_store(
+    project_dir: str,
+    write: bool = False,
+    render: bool = True
+) -> Iterator[sqlite3.Connection]:
+    """Open the colony store in a transaction.
+    
+    Write transactions take the database write lock (BEGIN IMMEDIATE) up
+    front, import edited markdown, and re-render the views before commit,
+    which serializes writers across server processes. Pass render=False
+    for writes that don't touch the views. Readers run concurrently
+    under WAL and only lock when a view needs importing.
+    """
+    hm_dir = _hivemind_dir(project_dir)
+    hm_dir.mkdir(parents=True, exist_ok=True)
+    db_path = hm_dir / "hivemind.db"
+    
+    conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        key = str(db_path.resolve())
+        if key not in _store_ready:
+            _migrate_store(conn)
+            conn.executescript(STORE_SCHEMA)
+            _store_ready.add(key)
+        
+        locked = write or _markdown_changed(conn, project_dir)
+        conn.execute("BEGIN IMMEDIATE" if locked else "BEGIN")
+        try:
+            if locked:
+                _sync_markdown(conn, project_dir)
+            marks = _view_marks(conn) if write and render else None
+            yield conn
+            if marks is not None:
+                _resync_markdown(conn, project_dir, marks)
+                _render_markdown(conn, project_dir)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def _append_message(
+    project_dir: str,
+    sender: str,
+    recipient: str,
+    message_type: str,
+    subject: str,
+    body: str
+) -> str:
+    """Store a new ACTIVE message, re-render MESSAGES.md and return its timestamp."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    with _open_store(project_dir, write=True) as conn:
+        conn.execute(
+            "INSERT INTO messages (timestamp, sender, recipient, message_type, subject, body, trace_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (timestamp, sender, recipient, message_type, subject, body.strip(), _current_trace_id())
+        )
+    return timestamp
+
+
+def _set_agent_status(conn: sqlite3.Connection, agent: str, status: str, **fields: str) -> None:
+    """Upsert an agent's STATUS.md section, keeping fields the agent wrote."""
+    row = conn.execute(
+        "SELECT fields FROM agent_status WHERE agent = ?", (agent,)
+    ).fetchone()
+    merged = json.loads(row["fields"]) if row else {}
+    merged["Status"] = status
+    merged.update({k: v for k, v in fields.items() if v})
+    position = conn.execute(
+        "SELECT COALESCE(MAX(position), -1) + 1 FROM agent_status"
+    ).fetchone()[0]
+    conn.execute(
+        "INSERT INTO agent_status (agent, status, fields, position, updated_at) "
+        "VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(agent) DO UPDATE SET status = excluded.status, "
+        "fields = excluded.fields, updated_at = excluded.updated_at",
+        (agent, status, json.dumps(merged), position, _now())
+    )
+
+
+def _record_spawn(
+    params: TmuxSpawnInput,
+    session_name: str,
+    working_dir: str,
+    repo_dir: str,
+    reused_from: Optional[str] = None
+) -> None:
+    """Record a spawn, its initial task and the agent's ACTIVE status."""
+    now = _now()
+    with _open_store(DEFAULT_PROJECT_DIR, write=True) as conn:
+        conn.execute(
+            "INSERT INTO spawns (session, agent, program, model, working_dir, repo_dir, "
+            "worktree, branch, initial_prompt, reused_from, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                session_name, params.name, params.program.value, params.model,
+                working_dir, repo_dir, int(params.use_worktree),
+                (params.branch_name or params.name) if params.use_worktree else None,
+                params.initial_prompt, reused_from, now
+            )
+        )
+        task = ""
+        if params.initial_prompt:
+            conn.execute(
+                "INSERT INTO tasks (agent, task, assigned_at) VALUES (?, ?, ?)",
+                (params.name, params.initial_prompt, now)
+            )
+            task = params.initial_prompt.splitlines()[0][:120]
+        _set_agent_status(conn, params.name, "ACTIVE", Session=session_name, Started=now, Task=task)
+
+
+def _record_session_end(session_name: str, reason: str) -> None:
+    """Close the open spawn record of a session that was killed or parked."""
+    now = _now()
+    with _open_store(DEFAULT_PROJECT_DIR, write=True) as conn:
+        row = conn.execute(
+            "SELECT id, agent FROM spawns WHERE session = ? AND ended_at IS NULL "
+            "ORDER BY id DESC LIMIT 1",
+            (session_name,)
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute(
+            "UPDATE spawns SET ended_at = ?, end_reason = ? WHERE id = ?",
+            (now, reason, row["id"])
+        )
+        conn.execute(
+            "UPDATE tasks SET status = 'STOPPED', finished_at = ? "
+            "WHERE agent = ? AND status = 'ASSIGNED'",
+            (now, row["agent"])
+        )
+        _set_agent_status(conn, row["agent"], reason.upper())
+
+
+# =============================================================================
+# Shared Context Cache
+# =============================================================================
+#
+# Content-addressed blobs under .hivemind/cache/<sha256>, shared by every
+# agent. A blob's mtime is bumped whenever it is used, so eviction drops the
+# least recently used blobs once the cache grows past CACHE_MAX_BYTES.
+
+_BLOB_REF = re.compile(r"\{\{blob:([0-9a-f]{8,64})\}\}")
+_BLOB_HASH = re.compile(r"^[0-9a-f]{8,64}$")
+
+
+def _cache_dir(project_dir: str) -> Path:
+    return _hivemind_dir(project_dir) / "cache"
+
+
+def _cache_evict(cache_dir: Path, keep: str) -> List[str]:
+    """Remove least recently used blobs until the cache fits CACHE_MAX_BYTES."""
+    blobs = []
+    total = 0
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and not entry.name.startswith("."):
+            st = entry.stat()
+            blobs.append((st.st_mtime_ns, entry.name, st.st_size))
+            total += st.st_size
+    
+    evicted = []
+    for _, name, size in sorted(blobs):
+        if total <= CACHE_MAX_BYTES:
+            break
+        if name == keep:
+            continue
+        try:
+            os.remove(cache_dir / name)
+        except FileNotFoundError:
+            # Another server process evicted it first
+            pass
+        total -= size
+        evicted.append(name)
+    return evicted
+
+
+def _cache_put(project_dir: str, data: bytes) -> Dict[str, Any]:
+    """Store a blob (deduplicated by hash) and return its hash and path."""
+    digest = hashlib.sha256(data).hexdigest()
+    cache_dir = _cache_dir(project_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / digest
+    
+    existed = path.exists()
+    if existed:
+        os.utime(path)
+    else:
+        tmp = cache_dir / f".{digest}.{os.getpid()}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    
+    return {
+        "hash": digest,
+        "path": str(path),
+        "bytes": len(data),
+        "deduplicated": existed,
+        "evicted": _cache_evict(cache_dir, keep=digest)
+    }
+
+
+def _cache_lookup(project_dir: str, ref: str) -> Path:
+    """Resolve a full hash or unique prefix (8+ chars) to a blob path."""
+    if not _BLOB_HASH.match(ref):
+        raise ValueError(f"Invalid blob hash '{ref}' (expected 8-64 lowercase hex characters)")
+    cache_dir = _cache_dir(project_dir)
+    if len(ref) == 64:
+        matches = [cache_dir / ref] if (cache_dir / ref).exists() else []
+    else:
+        matches = list(cache_dir.glob(f"{ref}*")) if cache_dir.exists() else []
+        matches = [m for m in matches if not m.name.startswith(".")]
+    if not matches:
+        raise ValueError(f"No cached blob matches '{ref}'")
+    if len(matches) > 1:
+        raise ValueError(f"Blob prefix '{ref}' is ambiguous; use more characters")
+    os.utime(matches[0])
+    return matches[0]
+
+
+def _expand_blob_refs(text: str, project_dir: str, inline: bool) -> str:
+    """Replace {{blob:<hash>}} references with the blob's path or its content."""
+    def replace(match: "re.Match[str]") -> str:
+        path = _cache_lookup(project_dir, match.group(1))
+        if inline:
+            return path.read_text(errors="replace")
+        return str(path)
+    return _BLOB_REF.sub(replace, text)
+
+
+# =============================================================================
+# Output Trigger Engine
+# =============================================================================
+
+DEFAULT_TRIGGERS: Dict[str, str] = {
+    "traceback": r"Traceback \(most recent call last\)",
+    "rate_limit": (
+        r"\bHTTP(?:/[\d.]+)? 429\b|(?i:\b429 too many requests|(?:status|error) code:? 429\b"
+        r"|rate limit (?:exceeded|reached))|\bRateLimitError\b"
+    ),
+    "permission_prompt": r"Allow this command\?|Do you want to proceed\?|\[y/n\]",
+    "test_failure": r"=+ .*\b\d+ failed\b.*=+|^FAILED \S+::|(?i:tests?:\s+\d+ failed)",
+}
+
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07]*\x07|\x1b[@-Z\\-_]")
+_TRIGGER_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Pane streams are truncated once fully consumed past this size
+STREAM_MAX_BYTES = 1024 * 1024
+
+
+def _compile_triggers(triggers: Dict[str, str]) -> "re.Pattern[str]":
+    """Combine all triggers into one alternation so each line is scanned once.
+    
+    Each trigger becomes a named group; match.lastgroup tells which fired.
+    """
+    branches = []
+    for name, pattern in triggers.items():
+        if not _TRIGGER_NAME.match(name):
+            raise ValueError(f"Invalid trigger name '{name}' (use letters, digits, _)")
+        branches.append(f"(?P<{name}>{pattern})")
+    try:
+        return re.compile("|".join(branches), re.MULTILINE)
+    except re.error as e:
+        raise ValueError(f"Invalid trigger pattern: {e}")
+
+
+def _list_hive_panes() -> List[tuple]:
+    """Return (pane_id, session_name, piped) for every hivemind pane."""
+    result = _run_tmux_command([
+        "list-panes", "-a", "-F", "#{pane_id}|#{pane_pipe}|#{session_name}"
+    ])
+    if result.returncode != 0:
+        return []
+    panes = []
+    for line in result.stdout.splitlines():
+        # Session name last, since it may itself contain the separator
+        pane_id, piped, session_name = line.split("|", 2)
+        if session_name.startswith(f"{TMUX_PREFIX}-"):
+            panes.append((pane_id, session_name, piped == "1"))
+    return panes
+
+
+class _TriggerEngine:
+    """Streams pane output through tmux pipe-pane and raises ALERT messages.
+    
+    Every watched pane is piped to .hivemind/streams/<pane_id>.log, keyed
+    by pane id so park/claim renames keep the same stream. A single background
+    task tails those files and runs the combined trigger pattern over newly
+    written lines only, so no tmux_read polling is needed.
+    """
+    
+    poll_interval = 0.5
+    discover_interval = 5.0
+    
+    def __init__(self) -> None:
+        self.task: Optional[asyncio.Task] = None
+        self.pattern: Optional["re.Pattern[str]"] = None
+        self.triggers: Dict[str, str] = {}
+        self.project_dir = DEFAULT_PROJECT_DIR
+        self.only_sessions: Optional[List[str]] = None
+        self.cooldown = 60
+        self.notify_session: Any = None
+        self.panes: Dict[str, str] = {}
+        self.offsets: Dict[str, int] = {}
+        self.partial: Dict[str, str] = {}
+        self.last_fired: Dict[tuple, float] = {}
+        self.fired: Dict[str, int] = {}
+        self.errors = 0
+        self.last_error: Optional[str] = None
+    
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+    
+    def stream_path(self, pane_id: str) -> Path:
+        return Path(self.project_dir) / ".hivemind" / "streams" / f"pane-{pane_id.lstrip('%')}.log"
+    
+    def attach(self, pane_id: str, session_name: str, piped: bool) -> None:
+        """Pipe a pane's output into its stream file unless already piped.
+        
+        pipe-pane -o would toggle an existing pipe off (another server, a
+        restart), so the pane's #{pane_pipe} flag is checked instead.
+        """
+        self.panes[pane_id] = session_name
+        path = self.stream_path(pane_id)
+        if pane_id not in self.offsets:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Only scan output produced from now on
+            self.offsets[pane_id] = path.stat().st_size if path.exists() else 0
+            self.partial[pane_id] = ""
+        if not piped:
+            _run_tmux_command([
+                "pipe-pane", "-t", pane_id, f"cat >> {shlex.quote(str(path))}"
+            ])
+    
+    def forget(self, pane_id: str) -> None:
+        self.panes.pop(pane_id, None)
+        self.offsets.pop(pane_id, None)
+        self.partial.pop(pane_id, None)
+    
+    def detach(self, pane_id: str) -> None:
+        """Close a pane's pipe and forget its read position."""
+        _run_tmux_command(["pipe-pane", "-t", pane_id])
+        self.forget(pane_id)
+    
+    def start(self, params: HivemindWatchInput, notify_session: Any = None) -> None:
+        triggers = dict(DEFAULT_TRIGGERS)
+        triggers.update(params.triggers or {})
+        self.pattern = _compile_triggers(triggers)
+        self.triggers = triggers
+        self.project_dir = params.project_dir or DEFAULT_PROJECT_DIR
+        self.only_sessions = (
+            [_get_session_name(n) for n in params.sessions] if params.sessions else None
+        )
+        self.cooldown = params.cooldown_seconds
+        self.notify_session = notify_session if params.notify else None
+        if not self.running:
+            self.task = asyncio.create_task(self._run())
+    
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        for pane_id in list(self.offsets):
+            self.detach(pane_id)
+    
+    def _discover(self) -> None:
+        """Attach new panes, re-open closed pipes and drop exited panes."""
+        live = _list_hive_panes()
+        wanted = {
+            pane_id for pane_id, session_name, _ in live
+            if self.only_sessions is None or session_name in self.only_sessions
+        }
+        for pane_id, session_name, piped in live:
+            if pane_id in wanted:
+                self.attach(pane_id, session_name, piped)
+        live_ids = {pane_id for pane_id, _, _ in live}
+        for pane_id in set(self.offsets) - wanted:
+            if pane_id in live_ids:
+                self.detach(pane_id)
+            else:
+                self.forget(pane_id)
+    
+    def _read_new(self, pane_id: str) -> str:
+        """Return complete lines written to the stream since the last read."""
+        path = self.stream_path(pane_id)
+        offset = self.offsets.get(pane_id, 0)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return ""
+        if size < offset:
+            offset = 0
+        if size == offset:
+            return ""
+        with open(path, "rb") as f:
+            f.seek(offset)
+            chunk = f.read(size - offset)
+        offset = size
+        if offset >= STREAM_MAX_BYTES and path.stat().st_size == offset:
+            # Writer uses O_APPEND, so truncating keeps the stream consistent
+            os.truncate(path, 0)
+            offset = 0
+        self.offsets[pane_id] = offset
+        
+        text = self.partial.get(pane_id, "") + chunk.decode("utf-8", "replace")
+        text = _ANSI_ESCAPE.sub("", text).replace("\r", "\n")
+        complete, _, rest = text.rpartition("\n")
+        self.partial[pane_id] = rest[-4096:]
+        return complete
+    
+    async def scan(self, pane_id: str) -> List[Dict[str, str]]:
+        """Run the combined pattern over new output and raise alerts."""
+        text = self._read_new(pane_id)
+        if not text or self.pattern is None:
+            return []
+        session_name = self.panes.get(pane_id, pane_id)
+        
+        alerts = []
+        seen = set()
+        for match in self.pattern.finditer(text):
+            trigger = match.lastgroup
+            if trigger in seen:
+                continue
+            seen.add(trigger)
+            key = (session_name, trigger)
+            now = time.monotonic()
+            if now - self.last_fired.get(key, float("-inf")) < self.cooldown:
+                continue
+            self.last_fired[key] = now
+            self.fired[trigger] = self.fired.get(trigger, 0) + 1
+            
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            line_end = text.find("\n", match.end())
+            line = text[line_start:line_end if line_end != -1 else len(text)].strip()
+            alerts.append({"session": session_name, "trigger": trigger, "line": line})
+        
+        for alert in alerts:
+            try:
+                await self._raise(alert)
+            except Exception:
+                # Let the next match retry instead of sitting out the cooldown
+                self.last_fired.pop((session_name, alert["trigger"]), None)
+                raise
+        return alerts
+    
+    async def _raise(self, alert: Dict[str, str]) -> None:
+        short_name = alert["session"].replace(f"{TMUX_PREFIX}-", "")
+        _append_message(
+            self.project_dir,
+            "TRIGGERS",
+            "CONDUCTOR",
+            "ALERT",
+            f"{alert['trigger']} in {short_name}",
+            f"Session `{alert['session']}` matched trigger `{alert['trigger']}`:\n\n"
+            f"```\n{alert['line'][:500]}\n```"
+        )
+        if self.notify_session is not None:
+            try:
+                await self.notify_session.send_log_message(
+                    level="warning",
+                    data=alert,
+                    logger="hivemind.triggers"
+                )
+            except Exception:
+                # Client went away; keep writing ALERT messages regardless
+                self.notify_session = None
+    
+    async def _run(self) -> None:
+        # Not part of the hivemind_watch call that started it
+        _current_span.set(None)
+        last_discover = float("-inf")
+        while True:
+            if time.monotonic() - last_discover >= self.discover_interval:
+                try:
+                    self._discover()
+                except Exception as e:
+                    self._failed("discovering sessions", e)
+                last_discover = time.monotonic()
+            for pane_id in list(self.offsets):
+                try:
+                    await self.scan(pane_id)
+                except Exception as e:
+                    # A locked store or vanished stream must not stop the watcher
+                    self._failed(f"scanning {self.panes.get(pane_id, pane_id)}", e)
+            await asyncio.sleep(self.poll_interval)
+    
+    def _failed(self, action: str, error: Exception) -> None:
+        self.errors += 1
+        self.last_error = f"{action}: {error}"
+        logger.warning("Trigger engine error while %s", action, exc_info=error)
+
+
+_triggers = _TriggerEngine()
+
+
+# =============================================================================
+# Agent Pool
+# =============================================================================
+
+# Commands that reset an agent's conversation so it can take a new task
+POOL_RESET_COMMANDS: Dict[AgentProgram, List[str]] = {
+    AgentProgram.AIDER: ["/clear", "/drop"],
+    AgentProgram.OLLAMA: ["/clear", "/drop"],
+    AgentProgram.CLAUDE: ["/clear"],
+}
+
+# Spawn metadata lives in tmux user options so every server process sees it
+_SESSION_OPTIONS = ("program", "model", "workdir", "repo", "worktree", "auto_accept", "parked")
+
+
+def _set_session_meta(session_name: str, **values: str) -> None:
+    """Store hivemind metadata on a tmux session as @hivemind_* options."""
+    for key, value in values.items():
+        _run_tmux_command(["set-option", "-t", session_name, f"@hivemind_{key}", value])
+
+
+def _list_session_meta() -> List[Dict[str, str]]:
+    """Return name plus @hivemind_* metadata for every hivemind session."""
+    fmt = "|".join(["#{session_name}"] + [f"#{{@hivemind_{k}}}" for k in _SESSION_OPTIONS])
+    result = _run_tmux_command(["list-sessions", "-F", fmt])
+    if result.returncode != 0:
+        return []
+    sessions = []
+    for line in result.stdout.splitlines():
+        parts = line.split("|")
+        if len(parts) == len(_SESSION_OPTIONS) + 1 and parts[0].startswith(
+            (f"{TMUX_PREFIX}-", f"{POOL_PREFIX}-")
+        ):
+            sessions.append(dict(zip(("name",) + _SESSION_OPTIONS, parts)))
+    return sessions
+
+
+def _park_session(session_name: str) -> Optional[str]:
+    """Reset an agent and rename it into the pool. Returns the parked name.
+    
+    Returns None when the agent can't be pooled (unknown or custom program)
+    or the pool is full, in which case the caller should kill it.
+    """
+    meta = next((m for m in _list_session_meta() if m["name"] == session_name), None)
+    if meta is None or meta["parked"] == "1":
+        return None
+    try:
+        program = AgentProgram(meta["program"])
+    except ValueError:
+        return None
+    if program not in POOL_RESET_COMMANDS:
+        return None
+    if sum(1 for m in _list_session_meta() if m["parked"] == "1") >= POOL_SIZE:
+        return None
+    
+    for command in POOL_RESET_COMMANDS[program]:
+        _run_tmux_command(["send-keys", "-t", session_name, command, "Enter"])
+    
+    base = f"{POOL_PREFIX}-{session_name.replace(f'{TMUX_PREFIX}-', '', 1)}"
+    parked_name, n = base, 1
+    while _session_exists(parked_name):
+        n += 1
+        parked_name = f"{base}-{n}"
+    
+    result = _run_tmux_command(["rename-session", "-t", session_name, parked_name])
+    if result.returncode != 0:
+        return None
+    _set_session_meta(parked_name, parked="1")
+    return parked_name
+
+
+def _switch_worktree_branch(worktree_path: str, repo_dir: str, branch_name: str) -> bool:
+    """Point a parked agent's worktree at squad/<branch_name>.
+    
+    Running agents can't change directory, so a reused worktree agent keeps
+    its directory and the worktree is switched to the new branch instead.
+    """
+    dirty = subprocess.run(
+        ["git", "status", "--porcelain"],
+        cwd=worktree_path,
+        capture_output=True,
+        text=True
+    )
+    if dirty.returncode != 0 or dirty.stdout.strip():
+        return False
+    
+    base = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=repo_dir,
+        capture_output=True,
+        text=True
+    )
+    if base.returncode != 0:
+        return False
+    
+    branch = f"squad/{branch_name}"
+    result = subprocess.run(
+        ["git", "switch", "-c", branch, base.stdout.strip()],
+        cwd=worktree_path,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        # Branch already exists
+        result = subprocess.run(
+            ["git", "switch", branch],
+            cwd=worktree_path,
+            capture_output=True,
+            text=True
+        )
+    return result.returncode == 0
+
+
+def _claim_pooled(params: TmuxSpawnInput, session_name: str) -> Optional[Dict[str, str]]:
+    """Rename a matching parked agent to session_name and return its metadata."""
+    working_dir = params.working_dir or DEFAULT_PROJECT_DIR
+    for meta in _list_session_meta():
+        if meta["parked"] != "1":
+            continue
+        if meta["program"] != params.program.value or meta["model"] != (params.model or ""):
+            continue
+        # Never hand out an agent started with --yes to a spawn that asked for prompts
+        if meta["auto_accept"] != ("1" if params.auto_accept else "0"):
+            continue
+        if params.use_worktree:
+            if meta["worktree"] != "1" or meta["repo"] != working_dir:
+                continue
+        elif meta["worktree"] == "1" or meta["workdir"] != working_dir:
+            continue
+        
+        # Renaming first claims the agent; a concurrent claimer's rename fails
+        result = _run_tmux_command(["rename-session", "-t", meta["name"], session_name])
+        if result.returncode != 0:
+            continue
+        
+        if params.use_worktree and not _switch_worktree_branch(
+            meta["workdir"], working_dir, params.branch_name or params.name
+        ):
+            _run_tmux_command(["rename-session", "-t", session_name, meta["name"]])
+            continue
+        
+        _set_session_meta(session_name, parked="0")
+        return meta
+    return None
+
+
+# =============================================================================
+# Send Rate Limiting and Usage Accounting
+# =============================================================================
+
+def _approx_tokens(text: str) -> int:
+    """Rough token estimate (~4 bytes per token) for cost accounting."""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+# tmux_read accounting is buffered per session as [reads, bytes, tokens] and
+# written with the next send, usage report or after READ_FLUSH_INTERVAL, so
+# reads don't take a write lock on the store every time
+READ_FLUSH_INTERVAL = 30.0
+_pending_reads: Dict[str, List[int]] = {}
+_reads_flushed_at = time.monotonic()
+
+
+def _record_usage(session_name: str, sent: str = "", read: str = "") -> None:
+    """Add bytes/tokens sent to or read from a session to the colony totals."""
+    if read:
+        pending = _pending_reads.setdefault(session_name, [0, 0, 0])
+        pending[0] += 1
+        pending[1] += len(read.encode("utf-8"))
+        pending[2] += _approx_tokens(read)
+        if time.monotonic() - _reads_flushed_at < READ_FLUSH_INTERVAL and not sent:
+            return
+    _flush_usage(session_name, sent)
+
+
+def _flush_usage(session_name: str = "", sent: str = "") -> None:
+    """Write buffered read counts, plus one send if given, to the store."""
+    global _reads_flushed_at
+    now = _now()
+    rows = [
+        (session, 0, reads, 0, nbytes, 0, tokens, now)
+        for session, (reads, nbytes, tokens) in _pending_reads.items()
+    ]
+    if sent:
+        rows.append((
+            session_name, 1, 0, len(sent.encode("utf-8")), 0, _approx_tokens(sent), 0, now
+        ))
+    if not rows:
+        return
+    with _open_store(DEFAULT_PROJECT_DIR, write=True, render=False) as conn:
+        conn.executemany(
+            "INSERT INTO usage (session, sends, reads, bytes_sent, bytes_read, "
+            "tokens_sent, tokens_read, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(session) DO UPDATE SET "
+            "sends = sends + excluded.sends, reads = reads + excluded.reads, "
+            "bytes_sent = bytes_sent + excluded.bytes_sent, "
+            "bytes_read = bytes_read + excluded.bytes_read, "
+            "tokens_sent = tokens_sent + excluded.tokens_sent, "
+            "tokens_read = tokens_read + excluded.tokens_read, "
+            "updated_at = excluded.updated_at",
+            rows
+        )
+    _pending_reads.clear()
+    _reads_flushed_at = time.monotonic()
+
+
+atexit.register(_flush_usage)
+
+
+def _tokens_sent_total() -> int:
+    with _open_store(DEFAULT_PROJECT_DIR) as conn:
+        return conn.execute("SELECT COALESCE(SUM(tokens_sent), 0) FROM usage").fetchone()[0]
+
+
+def _session_idle(session_name: str) -> bool:
+    """True when the session's window has shown no output for SEND_IDLE_SECONDS."""
+    result = _run_tmux_command(["display-message", "-t", session_name, "-p", "#{window_activity}"])
+    if result.returncode != 0 or not result.stdout.strip().isdigit():
+        return True
+    return time.time() - int(result.stdout.strip()) >= SEND_IDLE_SECONDS
+
+
+def _send_keys(session_name: str, text: str, press_enter: bool) -> subprocess.CompletedProcess:
+    """Type text into a session and record it in the usage accounting."""
+    args = ["send-keys", "-t", session_name, text]
+    if press_enter:
+        args.append("Enter")
+    result = _run_tmux_command(args)
+    if result.returncode == 0:
+        _record_usage(session_name, sent=text)
+    return result
+
+
+# Keys that interrupt an agent; sending one discards its queued sends
+INTERRUPT_KEYS = ("\x03", "\x1b")
+
+
+class _TokenBucket:
+    """Classic token bucket: `rate` sends per second, bursts up to `burst`.
+    
+    A rate of zero or less disables limiting.
+    """
+    
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def try_take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def wait_time(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class _SendQueue:
+    """Per-session rate limiter and FIFO for tmux_send.
+    
+    Sends go straight through while the session's bucket has tokens and
+    nothing is already queued. Otherwise they are queued and a per-session
+    task delivers them in order as tokens refill (and, if asked, once the
+    agent's pane has gone quiet).
+    """
+    
+    def __init__(self) -> None:
+        self.buckets: Dict[str, _TokenBucket] = {}
+        self.pending: Dict[str, List[Dict[str, Any]]] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.dropped: Dict[str, int] = {}
+    
+    def bucket(self, session_name: str) -> _TokenBucket:
+        if session_name not in self.buckets:
+            self.buckets[session_name] = _TokenBucket(SEND_RATE_PER_MINUTE / 60.0, SEND_BURST)
+        return self.buckets[session_name]
+    
+    def try_send_now(self, session_name: str, wait_for_idle: bool) -> bool:
+        """Claim a send slot if nothing is queued ahead and the agent is ready."""
+        if self.pending.get(session_name):
+            return False
+        if wait_for_idle and not _session_idle(session_name):
+            return False
+        return self.bucket(session_name).try_take()
+    
+    def clear(self, session_name: str) -> int:
+        """Drop a session's queued sends and return how many there were."""
+        queue = self.pending.get(session_name, [])
+        dropped = len(queue)
+        # Cleared in place so a running delivery task sees it and stops
+        queue.clear()
+        if dropped:
+            self.dropped[session_name] = self.dropped.get(session_name, 0) + dropped
+        return dropped
+    
+    def enqueue(self, session_name: str, text: str, press_enter: bool, wait_for_idle: bool) -> int:
+        queue = self.pending.setdefault(session_name, [])
+        queue.append({"text": text, "press_enter": press_enter, "wait_for_idle": wait_for_idle})
+        task = self.tasks.get(session_name)
+        if task is None or task.done():
+            self.tasks[session_name] = asyncio.create_task(self._deliver(session_name))
+        return len(queue)
+    
+    async def _deliver(self, session_name: str) -> None:
+        # Queued text was already tagged; don't attach later tmux calls to the enqueuing trace
+        _current_span.set(None)
+        queue = self.pending[session_name]
+        bucket = self.bucket(session_name)
+        while queue:
+            if not _session_exists(session_name):
+                self.dropped[session_name] = self.dropped.get(session_name, 0) + len(queue)
+                queue.clear()
+                break
+            item = queue[0]
+            if item["wait_for_idle"] and not _session_idle(session_name):
+                await asyncio.sleep(1.0)
+                continue
+            if not bucket.try_take():
+                await asyncio.sleep(bucket.wait_time())
+                continue
+            queue.pop(0)
+            _send_keys(session_name, item["text"], item["press_enter"])
+
+
+_send_queue = _SendQueue()
+
+
+# =============================================================================
+# Ollama Backend Manager
+# =============================================================================
+
+def _ollama_model_name(program: AgentProgram, model: Optional[str]) -> Optional[str]:
+    """Return the ollama model an agent will use, or None if it isn't ollama-backed."""
+    if program == AgentProgram.OLLAMA:
+        model = model or AgentModel.OLLAMA_CODELLAMA.value
+    elif program != AgentProgram.AIDER or not model:
+        return None
+    for prefix in ("ollama/", "ollama_chat/"):
+        if model.startswith(prefix):
+            name = model[len(prefix):]
+            return name if ":" in name else f"{name}:latest"
+    return None
+
+
+def _ollama_request(path: str, payload: Optional[Dict[str, Any]] = None, timeout: float = 5.0) -> Dict[str, Any]:
+    """Call the ollama HTTP API (GET, or POST when a payload is given)."""
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(
+        f"{OLLAMA_URL.rstrip('/')}{path}",
+        data=data,
+        headers={"Content-Type": "application/json"}
+    )
+    with _span(f"ollama {path}"):
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read() or b"{}")
+
+
+def _ollama_is_local() -> bool:
+    host = urllib.parse.urlparse(OLLAMA_URL).hostname or ""
+    return host in ("localhost", "127.0.0.1", "::1", "0.0.0.0")
+
+
+def _available_memory() -> Optional[int]:
+    """Bytes of memory available for new allocations, from /proc/meminfo."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+async def _ollama_snapshot() -> Dict[str, Any]:
+    """Query backend health, loaded models and installed models concurrently."""
+    version, ps, tags = await asyncio.gather(
+        asyncio.to_thread(_ollama_request, "/api/version"),
+        asyncio.to_thread(_ollama_request, "/api/ps"),
+        asyncio.to_thread(_ollama_request, "/api/tags")
+    )
+    return {
+        "version": version.get("version"),
+        "loaded": {m["name"]: m.get("size", 0) for m in ps.get("models", [])},
+        "installed": {m["name"]: m.get("size", 0) for m in tags.get("models", [])}
+    }
+
+
+# One lock per model, so concurrent spawns on the same model share a single warm-up
+_ollama_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def _ensure_ollama_model(name: str) -> Dict[str, Any]:
+    """Make sure a model is loaded, warming it up if there is room for it.
+    
+    Returns a dict with "ready" and either "warmed"/"already_loaded" or
+    an "error" explaining why an agent on this model shouldn't start.
+    """
+    lock = _ollama_locks.setdefault(name, asyncio.Lock())
+    async with lock:
+        try:
+            snapshot = await _ollama_snapshot()
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return {"model": name, "ready": False, "error": f"Ollama backend unreachable at {OLLAMA_URL}: {e}"}
+        
+        if name in snapshot["loaded"]:
+            return {"model": name, "ready": True, "already_loaded": True}
+        if name not in snapshot["installed"]:
+            return {
+                "model": name,
+                "ready": False,
+                "error": f"Model '{name}' is not installed",
+                "suggestion": f"Run: ollama pull {name}"
+            }
+        
+        needed = int(snapshot["installed"][name] * OLLAMA_MEMORY_OVERHEAD)
+        available = _available_memory() if _ollama_is_local() else None
+        if available is not None and needed > available:
+            return {
+                "model": name,
+                "ready": False,
+                "error": f"Not enough memory for '{name}': needs ~{needed // 2**20} MiB, "
+                         f"{available // 2**20} MiB available",
+                "loaded_models": sorted(snapshot["loaded"]),
+                "suggestion": "Reuse a loaded model or stop agents on other models first"
+            }
+        
+        started = time.monotonic()
+        try:
+            # An empty generate request just loads the model and keeps it resident
+            await asyncio.to_thread(
+                _ollama_request,
+                "/api/generate",
+                {"model": name, "keep_alive": OLLAMA_KEEP_ALIVE},
+                OLLAMA_WARM_TIMEOUT
+            )
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return {"model": name, "ready": False, "error": f"Failed to load '{name}': {e}"}
+        return {"model": name, "ready": True, "warmed": True, "load_seconds": round(time.monotonic() - started, 2)}
+
+
+# =============================================================================
+# tmux Tools
+# =============================================================================
+
+@mcp.tool(
+    name="tmux_list",
+    annotations={
+        "title": "List Agent Sessions",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+@traced
+async def tmux_list(params: TmuxListInput) -> str:
+    """List all hivemind agent tmux sessions.
+    
+    Returns information about running agent sessions including:
+    - Session name
+    - Status (attached/detached)
+    - Working directory
+    - Program running
+    
+    Args:
+        params: Filter options for listing sessions
+        
+    Returns:
+        JSON list of session information
+    """
+    result = _run_tmux_command([
+        "list-sessions",
+        "-F",
+        "#{session_name}|#{session_attached}|#{session_path}|#{session_created}|#{@hivemind_parked}"
+    ])
+    
+    if result.returncode != 0:
+        if "no server running" in result.stderr or "no sessions" in result.stderr:
+            return json.dumps({"sessions": [], "count": 0})
+        return json.dumps({"error": f"Failed to list sessions: {result.stderr}"})
+    
+    sessions = []
+    prefix = params.filter_prefix or TMUX_PREFIX
+    
+    for line in result.stdout.strip().split("\n"):
+        if not line:
+            continue
+        parts = line.split("|")
+        if len(parts) >= 4:
+            name = parts[0]
+            if prefix and not name.startswith(prefix):
+                continue
+            
+            sessions.append({
+                "name": name,
+                "short_name": name.replace(f"{TMUX_PREFIX}-", ""),
+                "attached": parts[1] == "1",
+                "path": parts[2],
+                "created": parts[3],
+                "parked": len(parts) > 4 and parts[4] == "1"
+            })
+    
+    return json.dumps({
+        "sessions": sessions,
+        "count": len(sessions)
+    }, indent=2)
+
+
+@mcp.tool(
+    name="tmux_spawn",
+    annotations={
+        "title": "Spawn New Agent",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": False,
+        "openWorldHint": True
+    }
+)
+@traced
+async def tmux_spawn(params: TmuxSpawnInput) -> str:
+    """Spawn a new AI agent in a tmux session.
+    
+    Creates a new tmux session running the specified agent program.
+    Supports aider, claude code CLI, and ollama-backed agents.
+    
+    Args:
+        params: Configuration for the new agent session
+        
+    Returns:
+        JSON with session info and status
+    """
+    session_name = _get_session_name(params.name)
+    
+    # Check if session already exists
+    if _session_exists(session_name):
+        return json.dumps({
+            "error": f"Session '{session_name}' already exists",
+            "suggestion": "Use tmux_kill first or choose a different name"
+        })
+    
+    # Resolve blob references up front; the stored spawn keeps the short form
+    initial_prompt = None
+    if params.initial_prompt:
+        try:
+            initial_prompt = _expand_blob_refs(params.initial_prompt, DEFAULT_PROJECT_DIR, inline=False)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
+        initial_prompt = _tag_prompt(
+            initial_prompt, params.program.value,
+            force=None if params.program == AgentProgram.CUSTOM else True
+        )
+    
+    # Make sure an ollama-backed agent's model is loaded and fits in memory
+    backend_model = _ollama_model_name(params.program, params.model)
+    if backend_model and params.warm_backend:
+        backend = await _ensure_ollama_model(backend_model)
+        if not backend["ready"]:
+            return json.dumps(backend)
+    
+    # Reuse a parked agent of the same kind when one is available
+    if params.reuse_pooled:
+        pooled = _claim_pooled(params, session_name)
+        if pooled:
+            _set_session_meta(session_name, spawn=params.model_dump_json())
+            _record_spawn(
+                params, session_name, pooled["workdir"], pooled["repo"],
+                reused_from=pooled["name"]
+            )
+            if initial_prompt:
+                _send_keys(session_name, initial_prompt, True)
+            return json.dumps({
+                "success": True,
+                "session_name": session_name,
+                "short_name": params.name,
+                "program": params.program.value,
+                "model": params.model,
+                "working_dir": pooled["workdir"],
+                "worktree": params.use_worktree,
+                "reused_from": pooled["name"],
+                "attach_command": f"tmux attach -t {session_name}"
+            }, indent=2)
+    
+    # Determine working directory
+    repo_dir = params.working_dir or DEFAULT_PROJECT_DIR
+    working_dir = repo_dir
+    
+    # Create worktree if requested
+    if params.use_worktree:
+        branch_name = params.branch_name or params.name
+        try:
+            working_dir = _create_worktree(working_dir, branch_name)
+        except RuntimeError as e:
+            return json.dumps({"error": str(e)})
+    
+    # Build the agent command
+    try:
+        agent_cmd = _build_agent_command(params)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    
+    # Create tmux session, pointing ollama-backed agents at the managed server
+    env_args = ["-e", f"OLLAMA_API_BASE={OLLAMA_URL}"] if backend_model else []
+    result = _run_tmux_command([
+        "new-session",
+        "-d",
+        "-s", session_name,
+        "-c", working_dir,
+        *env_args,
+        agent_cmd
+    ])
+    
+    if result.returncode != 0:
+        return json.dumps({
+            "error": f"Failed to create session: {result.stderr}",
+            "command": f"tmux new-session -d -s {session_name} -c {working_dir} {agent_cmd}"
+        })
+    
+    _set_session_meta(
+        session_name,
+        program=params.program.value,
+        model=params.model or "",
+        workdir=working_dir,
+        repo=repo_dir,
+        worktree="1" if params.use_worktree else "0",
+        auto_accept="1" if params.auto_accept else "0",
+        parked="0",
+        spawn=params.model_dump_json()
+    )
+    _record_spawn(params, session_name, working_dir, repo_dir)
+    
+    # Send initial prompt if provided
+    if initial_prompt:
+        await asyncio.sleep(2)  # Wait for agent to start
+        _send_keys(session_name, initial_prompt, True)
+    
+    return json.dumps({
+        "success": True,
+        "session_name": session_name,
+        "short_name": params.name,
+        "program": params.program.value,
+        "model": params.model,
+        "working_dir": working_dir,
+        "worktree": params.use_worktree,
+        "attach_command": f"tmux attach -t {session_name}"
+    }, indent=2)
+
+
+@mcp.tool(
+    name="tmux_kill",
+    annotations={
+        "title": "Kill Agent Session",
+        "readOnlyHint": False,
+        "destructiveHint": True,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+@traced
+async def tmux_kill(params: TmuxKillInput) -> str:
+    """Kill an agent tmux session.
+    
+    Terminates the specified tmux session and the agent running in it.
+    With park=True (default under HIVEMIND_POOL_MODE) the agent is reset
+    with /clear and parked for reuse by a later tmux_spawn instead; it is
+    still killed if it can't be pooled or the pool is full.
+    
+    Args:
+        params: Session name to kill
+        
+    Returns:
+        JSON with result status
+    """
+    session_name = _get_session_name(params.name)
+    
+    if not _session_exists(session_name):
+        return json.dumps({
+            "error": f"Session '{session_name}' does not exist"
+        })
+    
+    if params.park:
+        parked_name = _park_session(session_name)
+        if parked_name:
+            _record_session_end(session_name, "parked")
+            return json.dumps({
+                "success": True,
+                "parked": parked_name
+            })
+    
+    result = _run_tmux_command(["kill-session", "-t", session_name])
+    
+    if result.returncode != 0:
+        return json.dumps({
+            "error": f"Failed to kill session: {result.stderr}"
+        })
+    
+    _record_session_end(session_name, "killed")
+    
+    return json.dumps({
+        "success": True,
+        "killed": session_name
+    })
+
+
+@mcp.tool(
+    name="tmux_send",
+    annotations={
+        "title": "Send to Agent",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": False,
+        "openWorldHint": True
+    }
+)
+@traced
+async def tmux_send(params: TmuxSendInput) -> str:
+    """Send text/command to an agent session.
+    
+    Sends keystrokes to the specified tmux session, allowing you
+    to communicate with the running agent. Sends are rate limited per
+    agent, by default to 6 per minute with bursts of 3
+    (HIVEMIND_SEND_RATE/HIVEMIND_SEND_BURST; a rate of 0 turns this off).
+    Over the limit, or with wait_for_idle while the agent is still busy,
+    the text is queued and delivered in order. An interrupt (Ctrl+C as
+    "\x03", or Escape) skips the limiter and drops the session's queued
+    sends so stale prompts aren't typed in after it.
+    
+    Args:
+        params: Session name and text to send
+        
+    Returns:
+        JSON with result status
+    """
+    session_name = _get_session_name(params.name)
+    
+    if not _session_exists(session_name):
+        return json.dumps({
+            "error": f"Session '{session_name}' does not exist"
+        })
+    
+    try:
+        text = _expand_blob_refs(params.text, DEFAULT_PROJECT_DIR, params.inline_blobs)
     except ValueError as e:
         return json.dumps({"error": str(e)})
     
-    # Create tmux session
+    # Interrupts (e.g. "\x03" for Ctrl+C) always go straight through
+    is_control = len(text) == 1 and ord(text) < 32
+    dropped = _send_queue.clear(session_name) if text in INTERRUPT_KEYS else 0
+    
+    if params.press_enter:
+        program = _run_tmux_command(["show-options", "-v", "-t", session_name, "@hivemind_program"])
+        text = _tag_prompt(
+            text, program.stdout.strip() if program.returncode == 0 else None, params.trace_tag
+        )
+    
+    preview = text[:100] + ("..." if len(text) > 100 else "")
+    
+    if not is_control:
+        if TOKEN_BUDGET and _tokens_sent_total() >= TOKEN_BUDGET:
+            return json.dumps({
+                "error": f"Colony token budget of {TOKEN_BUDGET} exhausted",
+                "suggestion": "Check hivemind_usage or raise HIVEMIND_TOKEN_BUDGET"
+            })
+        
+        if not _send_queue.try_send_now(session_name, params.wait_for_idle):
+            if not params.queue:
+                return json.dumps({
+                    "error": f"Rate limited: '{session_name}' is busy or over its send rate",
+                    "retry_after_seconds": round(_send_queue.bucket(session_name).wait_time(), 1)
+                })
+            position = _send_queue.enqueue(
+                session_name, text, params.press_enter, params.wait_for_idle
+            )
+            return json.dumps({
+                "success": True,
+                "queued": True,
+                "queue_position": position,
+                "sent_to": session_name,
+                "text": preview
+            })
+    
+    result = _send_keys(session_name, text, params.press_enter)
+    
+    if result.returncode != 0:
+        return json.dumps({
+            "error": f"Failed to send keys: {result.stderr}"
+        })
+    
+    response = {
+        "success": True,
+        "sent_to": session_name,
+        "text": preview
+    }
+    if text in INTERRUPT_KEYS:
+        response["dropped_queued_sends"] = dropped
+    return json.dumps(response)
+
+
+@mcp.tool(
+    name="tmux_read",
+    annotations={
+        "title": "Read Agent Output",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+@traced
+async def tmux_read(params: TmuxReadInput) -> str:
+    """Read recent output from an agent session.
+    
+    Captures the terminal buffer from the specified session,
+    showing what the agent has been outputting.
+    
+    Args:
+        params: Session name and number of lines to read
+        
+    Returns:
+        JSON with captured output
+    """
+    session_name = _get_session_name(params.name)
+    
+    if not _session_exists(session_name):
+        return json.dumps({
+            "error": f"Session '{session_name}' does not exist"
+        })
+    
+    result = _run_tmux_command([
+        "capture-pane",
+        "-t", session_name,
+        "-p",
+        "-S", f"-{params.lines}"
+    ])
+    
+    if result.returncode != 0:
+        return json.dumps({
+            "error": f"Failed to capture pane: {result.stderr}"
+        })
+    
+    output = result.stdout.rstrip()
+    lines = output.split("\n")
+    _record_usage(session_name, read=output)
+    
+    return json.dumps({
+        "session": session_name,
+        "lines_captured": len(lines),
+        "output": output
+    }, indent=2)
+
+
+@mcp.tool(
+    name="tmux_attach_info",
+    annotations={
+        "title": "Get Attach Info",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+@traced
+async def tmux_attach_info(params: TmuxAttachInfoInput) -> str:
+    """Get information for attaching to a session.
+    
+    Returns the commands and info needed to attach to an agent
+    session in a terminal.
+    
+    Args:
+        params: Session name
+        
+    Returns:
+        JSON with attach commands and working directory
+    """
+    session_name = _get_session_name(params.name)
+    
+    if not _session_exists(session_name):
+        return json.dumps({
+            "error": f"Session '{session_name}' does not exist"
+        })
+    
+    # Get session details
     result = _run_tmux_command([
-        "new-session",
-        "-d",
-        "-s", session_name,
-        "-c", working_dir,
-        agent_cmd
+        "display-message",
+        "-t", session_name,
+        "-p",
+        "#{session_path}|#{pane_current_path}"
     ])
     
-    if result.returncode != 0:
+    path = DEFAULT_PROJECT_DIR
+    if result.returncode == 0 and result.stdout.strip():
+        parts = result.stdout.strip().split("|")
+        path = parts[-1] if parts else DEFAULT_PROJECT_DIR
+    
+    return json.dumps({
+        "session": session_name,
+        "attach_command": f"tmux attach -t {session_name}",
+        "working_directory": path,
+        "cursor_terminal_hint": f"Run in terminal: tmux attach -t {session_name}"
+    }, indent=2)
+
+
+# =============================================================================
+# Hivemind File Tools
+# =============================================================================
+
+@mcp.tool(
+    name="hivemind_status",
+    annotations={
+        "title": "Read Hivemind Status",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+@traced
+async def hivemind_status(params: HivemindStatusInput) -> str:
+    """Read the swarm status.
+    
+    Returns the current swarm status including which agents are
+    active, idle, or blocked, as recorded in the colony store and
+    STATUS.md (edits agents make to STATUS.md are picked up).
+    
+    Args:
+        params: Project directory location and filters
+        
+    Returns:
+        JSON with per-agent status and the rendered STATUS.md
+    """
+    project_dir = params.project_dir or DEFAULT_PROJECT_DIR
+    hm_dir = _hivemind_dir(project_dir)
+    status_path = hm_dir / "STATUS.md"
+    
+    if not status_path.exists() and not (hm_dir / "hivemind.db").exists():
         return json.dumps({
-            "error": f"Failed to create session: {result.stderr}",
-            "command": f"tmux new-session -d -s {session_name} -c {working_dir} {agent_cmd}"
+            "error": f"STATUS.md not found at {status_path}",
+            "suggestion": "Initialize hivemind with the project first"
         })
     
-    # Send initial prompt if provided
-    if params.initial_prompt:
-        await asyncio.sleep(2)  # Wait for agent to start
-        _run_tmux_command([
-            "send-keys",
-            "-t", session_name,
-            params.initial_prompt,
-            "Enter"
-        ])
+    query = "SELECT * FROM agent_status"
+    args: List[str] = []
+    if params.agent:
+        query += " WHERE agent = ?"
+        args.append(params.agent)
+    query += " ORDER BY position, agent"
+    
+    with _open_store(project_dir) as conn:
+        agents = []
+        for row in conn.execute(query, args):
+            agent = {
+                "agent": row["agent"],
+                "status": row["status"],
+                "fields": json.loads(row["fields"]),
+                "notes": row["notes"],
+                "updated_at": row["updated_at"]
+            }
+            if params.include_tasks:
+                agent["tasks"] = [
+                    dict(t) for t in conn.execute(
+                        "SELECT task, status, assigned_at, finished_at FROM tasks "
+                        "WHERE agent = ? ORDER BY id", (row["agent"],)
+                    )
+                ]
+            agents.append(agent)
+    
+    return json.dumps({
+        "path": str(status_path),
+        "agents": agents,
+        "count": len(agents),
+        "content": status_path.read_text() if status_path.exists() else ""
+    }, indent=2)
+
+
+@mcp.tool(
+    name="hivemind_messages",
+    annotations={
+        "title": "Read Hivemind Messages",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+@traced
+async def hivemind_messages(params: HivemindMessagesInput) -> str:
+    """Read messages between agents and the conductor.
+    
+    Queries the colony store (kept in sync with MESSAGES.md), optionally
+    limited to one agent's messages, including broadcasts to ALL, or to
+    active (unresolved) messages. Entries written in other formats (the
+    filesystem connector's ## [timestamp] entries, dashboard broadcasts)
+    are returned unfiltered under other_entries.
+    
+    Args:
+        params: Filter options for messages
+        
+    Returns:
+        JSON list of messages, newest first, plus the raw file content
+    """
+    project_dir = params.project_dir or DEFAULT_PROJECT_DIR
+    hm_dir = _hivemind_dir(project_dir)
+    messages_path = hm_dir / "MESSAGES.md"
+    
+    if not messages_path.exists() and not (hm_dir / "hivemind.db").exists():
+        return json.dumps({
+            "error": f"MESSAGES.md not found at {messages_path}",
+            "suggestion": "Initialize hivemind with the project first"
+        })
+    
+    clauses = []
+    args: List[Any] = []
+    if params.filter_agent:
+        clauses.append("(sender = ? OR recipient = ? OR recipient = 'ALL')")
+        args += [params.filter_agent, params.filter_agent]
+    if params.only_active:
+        clauses.append("status = 'ACTIVE'")
+    query = "SELECT * FROM messages"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY id DESC LIMIT ?"
+    args.append(params.limit)
+    
+    with _open_store(project_dir) as conn:
+        messages = [
+            {
+                "id": row["id"],
+                "timestamp": row["timestamp"],
+                "sender": row["sender"],
+                "recipient": row["recipient"],
+                "type": row["message_type"],
+                "subject": row["subject"],
+                "body": row["body"],
+                "status": row["status"],
+                "trace_id": row["trace_id"]
+            }
+            for row in conn.execute(query, args)
+        ]
+        other_entries = _split_other_entries(_messages_extras(conn))
+        content = messages_path.read_text() if messages_path.exists() else _render_messages_md(conn)
+    
+    return json.dumps({
+        "path": str(messages_path),
+        "messages": messages,
+        "count": len(messages),
+        "other_entries": other_entries,
+        "content": content
+    }, indent=2)
+
+
+@mcp.tool(
+    name="hivemind_write_message",
+    annotations={
+        "title": "Write Hivemind Message",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": False,
+        "openWorldHint": False
+    }
+)
+@traced
+async def hivemind_write_message(params: HivemindWriteMessageInput) -> str:
+    """Write a message to .hivemind/MESSAGES.md.
+    
+    Stores a new message in the colony store and re-renders the
+    messages file for agent coordination.
+    
+    Args:
+        params: Message details
+        
+    Returns:
+        Confirmation of message written
+    """
+    project_dir = params.project_dir or DEFAULT_PROJECT_DIR
+    timestamp = _append_message(
+        project_dir,
+        params.sender,
+        params.recipient,
+        params.message_type,
+        params.subject,
+        params.body
+    )
     
     return json.dumps({
         "success": True,
-        "session_name": session_name,
-        "short_name": params.name,
-        "program": params.program.value,
-        "model": params.model,
-        "working_dir": working_dir,
-        "worktree": params.use_worktree,
-        "attach_command": f"tmux attach -t {session_name}"
+        "message_added": {
+            "timestamp": timestamp,
+            "sender": params.sender,
+            "recipient": params.recipient,
+            "type": params.message_type,
+            "subject": params.subject
+        }
+    }, indent=2)
+
+
+@mcp.tool(
+    name="hivemind_usage",
+    annotations={
+        "title": "Agent Send/Read Usage",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": False,
+        "openWorldHint": False
+    }
+)
+@traced
+async def hivemind_usage(params: HivemindUsageInput) -> str:
+    """Report bytes and approximate tokens sent to and read from agents.
+    
+    Counts every tmux_send, initial prompt and tmux_read per session,
+    across all server processes sharing the project. Also shows sends
+    still waiting in this server's rate-limit queue and the remaining
+    colony token budget.
+    
+    Args:
+        params: Optional session filter and reset flag
+        
+    Returns:
+        JSON with per-session usage and colony totals
+    """
+    _flush_usage()
+    query = "SELECT * FROM usage"
+    args: List[str] = []
+    if params.name:
+        query += " WHERE session = ?"
+        args.append(_get_session_name(params.name))
+    query += " ORDER BY tokens_sent DESC"
+    
+    with _open_store(DEFAULT_PROJECT_DIR, write=params.reset, render=False) as conn:
+        sessions = []
+        for row in conn.execute(query, args):
+            entry = dict(row)
+            entry["queued_sends"] = len(_send_queue.pending.get(row["session"], []))
+            entry["dropped_sends"] = _send_queue.dropped.get(row["session"], 0)
+            sessions.append(entry)
+        if params.reset:
+            if params.name:
+                conn.execute("DELETE FROM usage WHERE session = ?", args)
+            else:
+                conn.execute("DELETE FROM usage")
+    
+    tokens_sent = sum(s["tokens_sent"] for s in sessions)
+    totals = {
+        "bytes_sent": sum(s["bytes_sent"] for s in sessions),
+        "bytes_read": sum(s["bytes_read"] for s in sessions),
+        "tokens_sent": tokens_sent,
+        "tokens_read": sum(s["tokens_read"] for s in sessions),
+    }
+    
+    return json.dumps({
+        "sessions": sessions,
+        "totals": totals,
+        "token_budget": TOKEN_BUDGET or None,
+        "budget_remaining": max(0, TOKEN_BUDGET - _tokens_sent_total()) if TOKEN_BUDGET else None,
+        "send_rate_per_minute": SEND_RATE_PER_MINUTE,
+        "send_burst": SEND_BURST,
+        "reset": params.reset
+    }, indent=2)
+
+
+# =============================================================================
+# Backend Tools
+# =============================================================================
+
+@mcp.tool(
+    name="hivemind_ollama_status",
+    annotations={
+        "title": "Ollama Backend Status",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+@traced
+async def hivemind_ollama_status(params: OllamaStatusInput) -> str:
+    """Check the local ollama backend used by ollama-backed agents.
+    
+    Reports whether the server is reachable, which models are loaded
+    (and how much memory they hold), which are installed, and how much
+    memory is left for loading more.
+    
+    Args:
+        params: Whether to include installed models
+        
+    Returns:
+        JSON with backend health and model information
+    """
+    try:
+        snapshot = await _ollama_snapshot()
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return json.dumps({
+            "healthy": False,
+            "url": OLLAMA_URL,
+            "error": str(e),
+            "suggestion": "Start it with: ollama serve"
+        })
+    
+    result: Dict[str, Any] = {
+        "healthy": True,
+        "url": OLLAMA_URL,
+        "version": snapshot["version"],
+        "loaded_models": snapshot["loaded"],
+        "available_memory": _available_memory() if _ollama_is_local() else None,
+        "keep_alive": OLLAMA_KEEP_ALIVE
+    }
+    if params.include_installed:
+        result["installed_models"] = snapshot["installed"]
+    return json.dumps(result, indent=2)
+
+
+@mcp.tool(
+    name="hivemind_ollama_warm",
+    annotations={
+        "title": "Warm Ollama Models",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+@traced
+async def hivemind_ollama_warm(params: OllamaWarmInput) -> str:
+    """Pre-load ollama models so the first agent on each starts fast.
+    
+    Models are loaded one at a time, since loading several at once
+    makes them compete for memory. A model that doesn't fit in
+    available memory is reported instead of loaded.
+    
+    Args:
+        params: Models to load
+        
+    Returns:
+        JSON with the result for each model
+    """
+    results = []
+    for model in dict.fromkeys(params.models):
+        # Namespaced names like "user/model" are ollama models too
+        if not model.startswith(("ollama/", "ollama_chat/")):
+            model = f"ollama/{model}"
+        name = _ollama_model_name(AgentProgram.OLLAMA, model)
+        results.append(await _ensure_ollama_model(name))
+    
+    return json.dumps({
+        "success": all(r["ready"] for r in results),
+        "models": results
+    }, indent=2)
+
+
+@mcp.tool(
+    name="tmux_spawn_batch",
+    annotations={
+        "title": "Spawn Several Agents",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": False,
+        "openWorldHint": True
+    }
+)
+@traced
+async def tmux_spawn_batch(params: TmuxSpawnBatchInput) -> str:
+    """Spawn several agents, grouping ollama-backed ones by model.
+    
+    Agents that don't use ollama start right away in parallel. Ollama
+    agents are grouped by model: each model is loaded once, then its
+    whole group starts together before the next model is considered.
+    Groups whose model can't be loaded (backend down, not installed, or
+    not enough memory) are not started and are reported as deferred.
+    
+    Args:
+        params: List of agent spawn configurations
+        
+    Returns:
+        JSON with the spawn result for every agent
+    """
+    groups: Dict[Optional[str], List[TmuxSpawnInput]] = {}
+    for agent in params.agents:
+        groups.setdefault(_ollama_model_name(agent.program, agent.model), []).append(agent)
+    
+    results: Dict[str, Any] = {}
+    
+    async def spawn_all(agents: List[TmuxSpawnInput]) -> None:
+        outputs = await asyncio.gather(*(tmux_spawn(a) for a in agents))
+        for agent, output in zip(agents, outputs):
+            results[agent.name] = json.loads(output)
+    
+    await spawn_all(groups.pop(None, []))
+    
+    # Larger groups first, so the most-shared models get memory first
+    for model, agents in sorted(groups.items(), key=lambda g: -len(g[1])):
+        backend = await _ensure_ollama_model(model)
+        if not backend["ready"]:
+            for agent in agents:
+                results[agent.name] = {"deferred": True, **backend}
+            continue
+        await spawn_all(agents)
+    
+    return json.dumps({
+        "success": all(r.get("success") for r in results.values()),
+        "agents": [results[a.name] for a in params.agents]
     }, indent=2)
 
 
+# =============================================================================
+# Snapshot Tools
+# =============================================================================
+
+def _session_spawn_params(meta: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Recover the tmux_spawn parameters a session was started with."""
+    result = _run_tmux_command(["show-options", "-v", "-t", meta["name"], "@hivemind_spawn"])
+    if result.returncode == 0 and result.stdout.strip():
+        return json.loads(result.stdout)
+    if not meta["program"]:
+        # Not started by hivemind
+        return None
+    # Sessions spawned before full parameters were recorded
+    return {
+        "name": meta["name"].replace(f"{TMUX_PREFIX}-", ""),
+        "program": meta["program"],
+        "model": meta["model"] or None,
+        "working_dir": meta["repo"] or meta["workdir"],
+        "use_worktree": meta["worktree"] == "1",
+    }
+
+
+def _restore_branch(working_dir: str, branch: Optional[str]) -> Optional[str]:
+    """Put a reused directory back on its saved branch. Returns an error or None.
+    
+    Only a clean working tree is switched, so nothing an agent left
+    uncommitted is lost.
+    """
+    current = subprocess.run(
+        ["git", "branch", "--show-current"],
+        cwd=working_dir,
+        capture_output=True,
+        text=True
+    )
+    if not branch or current.returncode != 0 or current.stdout.strip() == branch:
+        return None
+    
+    dirty = subprocess.run(
+        ["git", "status", "--porcelain"],
+        cwd=working_dir,
+        capture_output=True,
+        text=True
+    )
+    if dirty.returncode != 0 or dirty.stdout.strip():
+        return (
+            f"{working_dir} is on '{current.stdout.strip() or 'detached HEAD'}' with uncommitted "
+            f"changes; it was saved on '{branch}'"
+        )
+    result = subprocess.run(
+        ["git", "switch", branch],
+        cwd=working_dir,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return f"Failed to switch {working_dir} to '{branch}': {result.stderr.strip()}"
+    return None
+
+
 @mcp.tool(
-    name="tmux_kill",
+    name="hivemind_save",
     annotations={
-        "title": "Kill Agent Session",
+        "title": "Save Swarm Snapshot",
         "readOnlyHint": False,
-        "destructiveHint": True,
+        "destructiveHint": False,
         "idempotentHint": True,
         "openWorldHint": False
     }
 )
-async def tmux_kill(params: TmuxKillInput) -> str:
-    """Kill an agent tmux session.
+@traced
+async def hivemind_save(params: HivemindSaveInput) -> str:
+    """Save the whole swarm to a snapshot file for hivemind_restore.
     
-    Terminates the specified tmux session and the agent running in it.
+    Records every running agent's spawn parameters, working directory
+    and branch, the tail of its scrollback and any sends still queued
+    for it, plus all active messages, in one gzipped JSON file.
+    Parked (pooled) agents are not saved.
     
     Args:
-        params: Session name to kill
+        params: Snapshot location and scrollback length
         
     Returns:
-        JSON with result status
+        JSON with the snapshot path and saved agents
     """
-    session_name = _get_session_name(params.name)
-    
-    if not _session_exists(session_name):
-        return json.dumps({
-            "error": f"Session '{session_name}' does not exist"
-        })
-    
-    result = _run_tmux_command(["kill-session", "-t", session_name])
+    project_dir = params.project_dir or DEFAULT_PROJECT_DIR
+    snapshot_path = Path(params.path or _hivemind_dir(project_dir) / "snapshot.json.gz")
     
-    if result.returncode != 0:
-        return json.dumps({
-            "error": f"Failed to kill session: {result.stderr}"
-        })
+    agents = []
+    skipped = []
+    for meta in _list_session_meta():
+        if meta["parked"] == "1":
+            continue
+        spawn = _session_spawn_params(meta)
+        if spawn is None:
+            skipped.append(meta["name"])
+            continue
+        
+        entry: Dict[str, Any] = {
+            "session": meta["name"],
+            "spawn": spawn,
+            "working_dir": meta["workdir"],
+            "queued_sends": list(_send_queue.pending.get(meta["name"], [])),
+            "scrollback": ""
+        }
+        entry["branch"] = None
+        # The directory may have been removed while the agent kept running
+        if meta["workdir"] and os.path.isdir(meta["workdir"]):
+            branch = subprocess.run(
+                ["git", "branch", "--show-current"],
+                cwd=meta["workdir"],
+                capture_output=True,
+                text=True
+            )
+            if branch.returncode == 0:
+                entry["branch"] = branch.stdout.strip() or None
+        if params.scrollback_lines:
+            capture = _run_tmux_command([
+                "capture-pane", "-t", meta["name"], "-p",
+                "-S", f"-{params.scrollback_lines}"
+            ])
+            if capture.returncode == 0:
+                entry["scrollback"] = capture.stdout.rstrip()
+        agents.append(entry)
+    
+    with _open_store(project_dir) as conn:
+        messages = [
+            dict(row) for row in conn.execute(
+                "SELECT timestamp, sender, recipient, message_type, subject, body "
+                "FROM messages WHERE status = 'ACTIVE' ORDER BY id"
+            )
+        ]
+    
+    snapshot = {
+        "version": 1,
+        "saved_at": _now(),
+        "project_dir": project_dir,
+        "agents": agents,
+        "messages": messages
+    }
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = snapshot_path.with_name(f".{snapshot_path.name}.{os.getpid()}.tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp, snapshot_path)
     
     return json.dumps({
         "success": True,
-        "killed": session_name
-    })
+        "path": str(snapshot_path),
+        "bytes": snapshot_path.stat().st_size,
+        "agents": [a["session"] for a in agents],
+        "messages": len(messages),
+        "skipped": skipped
+    }, indent=2)
 
 
 @mcp.tool(
-    name="tmux_send",
+    name="hivemind_restore",
     annotations={
-        "title": "Send to Agent",
+        "title": "Restore Swarm Snapshot",
         "readOnlyHint": False,
         "destructiveHint": False,
         "idempotentHint": False,
         "openWorldHint": True
     }
 )
-async def tmux_send(params: TmuxSendInput) -> str:
-    """Send text/command to an agent session.
-    
-    Sends keystrokes to the specified tmux session, allowing you
-    to communicate with the running agent.
+@traced
+async def hivemind_restore(params: HivemindRestoreInput) -> str:
+    """Bring back a swarm saved with hivemind_save.
+    
+    Respawns every saved agent in parallel (ollama agents grouped by
+    model, as in tmux_spawn_batch) with its saved spawn parameters, so
+    worktree agents get their squad/ worktree back. An agent working in
+    the repo itself is switched back to its saved branch, or not restored
+    if the repo has uncommitted changes on another branch. Agents that
+    are already running are left alone. Each agent's saved scrollback
+    is written to .hivemind/restore/<session>.log for reference. Active
+    messages missing from the store are re-added and queued sends are
+    re-queued.
     
     Args:
-        params: Session name and text to send
+        params: Snapshot location and restore options
         
     Returns:
-        JSON with result status
+        JSON with the result for every agent
     """
-    session_name = _get_session_name(params.name)
-    
-    if not _session_exists(session_name):
-        return json.dumps({
-            "error": f"Session '{session_name}' does not exist"
-        })
-    
-    args = ["send-keys", "-t", session_name, params.text]
-    if params.press_enter:
-        args.append("Enter")
-    
-    result = _run_tmux_command(args)
+    project_dir = params.project_dir or DEFAULT_PROJECT_DIR
+    snapshot_path = Path(params.path or _hivemind_dir(project_dir) / "snapshot.json.gz")
     
-    if result.returncode != 0:
+    if not snapshot_path.exists():
         return json.dumps({
-            "error": f"Failed to send keys: {result.stderr}"
+            "error": f"Snapshot not found at {snapshot_path}",
+            "suggestion": "Save one first with hivemind_save"
         })
+    with gzip.open(snapshot_path, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    
+    wanted = {_get_session_name(n) for n in params.only} if params.only else None
+    restore_dir = _hivemind_dir(project_dir) / "restore"
+    
+    to_spawn = []
+    running = []
+    results: List[Dict[str, Any]] = []
+    for entry in snapshot["agents"]:
+        session_name = entry["session"]
+        if wanted is not None and session_name not in wanted:
+            continue
+        if _session_exists(session_name):
+            running.append(session_name)
+            continue
+        
+        spawn = dict(entry["spawn"])
+        if not params.resend_prompt:
+            spawn["initial_prompt"] = None
+        # Worktree agents get their squad/ branch back from _create_worktree;
+        # an agent working in the repo itself is switched back to its branch
+        if not spawn.get("use_worktree") and entry["working_dir"] and os.path.isdir(entry["working_dir"]):
+            error = _restore_branch(entry["working_dir"], entry.get("branch"))
+            if error:
+                results.append({"session_name": session_name, "success": False, "error": error})
+                continue
+        to_spawn.append(TmuxSpawnInput(**spawn))
+        
+        if entry["scrollback"]:
+            restore_dir.mkdir(parents=True, exist_ok=True)
+            (restore_dir / f"{session_name}.log").write_text(entry["scrollback"] + "\n")
+    
+    if to_spawn:
+        batch = json.loads(await tmux_spawn_batch(TmuxSpawnBatchInput(agents=to_spawn)))
+        results += batch["agents"]
+    
+    restored = {r["session_name"] for r in results if r.get("success")}
+    requeued = 0
+    for entry in snapshot["agents"]:
+        if entry["session"] not in restored:
+            continue
+        for item in entry["queued_sends"]:
+            _send_queue.enqueue(entry["session"], item["text"], item["press_enter"], item["wait_for_idle"])
+            requeued += 1
+    
+    restored_messages = 0
+    if snapshot["messages"]:
+        with _open_store(project_dir, write=True) as conn:
+            for msg in snapshot["messages"]:
+                key = (msg["timestamp"], msg["sender"], msg["recipient"],
+                       msg["message_type"], msg["subject"], msg["body"])
+                exists = conn.execute(
+                    "SELECT 1 FROM messages WHERE timestamp = ? AND sender = ? AND recipient = ? "
+                    "AND message_type = ? AND subject = ? AND body = ?",
+                    key
+                ).fetchone()
+                if not exists:
+                    conn.execute(
+                        "INSERT INTO messages (timestamp, sender, recipient, message_type, subject, body) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        key
+                    )
+                    restored_messages += 1
     
     return json.dumps({
-        "success": True,
-        "sent_to": session_name,
-        "text": params.text[:100] + ("..." if len(params.text) > 100 else "")
-    })
+        "success": all(r.get("success") for r in results),
+        "saved_at": snapshot["saved_at"],
+        "agents": results,
+        "already_running": running,
+        "requeued_sends": requeued,
+        "restored_messages": restored_messages,
+        "scrollback_dir": str(restore_dir)
+    }, indent=2)
 
 
+# =============================================================================
+# Cache Tools
+# =============================================================================
+
 @mcp.tool(
-    name="tmux_read",
+    name="hivemind_cache_put",
     annotations={
-        "title": "Read Agent Output",
-        "readOnlyHint": True,
+        "title": "Put Shared Context Blob",
+        "readOnlyHint": False,
         "destructiveHint": False,
         "idempotentHint": True,
         "openWorldHint": False
     }
 )
-async def tmux_read(params: TmuxReadInput) -> str:
-    """Read recent output from an agent session.
-    
-    Captures the terminal buffer from the specified session,
-    showing what the agent has been outputting.
+@traced
+async def hivemind_cache_put(params: HivemindCachePutInput) -> str:
+    """Store a shared artifact (spec, repo map, etc.) once for all agents.
+    
+    Blobs are content-addressed: storing the same content twice keeps a
+    single copy. Reference the returned hash as {{blob:<hash>}} in
+    tmux_send text or an initial_prompt to hand agents the blob's path
+    instead of pasting the content into every prompt. The least recently
+    used blobs are evicted past HIVEMIND_CACHE_MAX_BYTES. The cache lives
+    in the server's project (HIVEMIND_PROJECT_DIR), where tmux_send and
+    tmux_spawn resolve references.
     
     Args:
-        params: Session name and number of lines to read
+        params: Content or file to store
         
     Returns:
-        JSON with captured output
+        JSON with the blob hash, path and reference string
     """
-    session_name = _get_session_name(params.name)
-    
-    if not _session_exists(session_name):
-        return json.dumps({
-            "error": f"Session '{session_name}' does not exist"
-        })
-    
-    result = _run_tmux_command([
-        "capture-pane",
-        "-t", session_name,
-        "-p",
-        "-S", f"-{params.lines}"
-    ])
+    if (params.content is None) == (params.file_path is None):
+        return json.dumps({"error": "Provide exactly one of content or file_path"})
     
-    if result.returncode != 0:
-        return json.dumps({
-            "error": f"Failed to capture pane: {result.stderr}"
-        })
+    if params.file_path is not None:
+        try:
+            data = Path(params.file_path).read_bytes()
+        except OSError as e:
+            return json.dumps({"error": f"Failed to read {params.file_path}: {e}"})
+    else:
+        data = params.content.encode("utf-8")
     
-    output = result.stdout.rstrip()
-    lines = output.split("\n")
+    blob = _cache_put(DEFAULT_PROJECT_DIR, data)
     
     return json.dumps({
-        "session": session_name,
-        "lines_captured": len(lines),
-        "output": output
+        "success": True,
+        **blob,
+        "reference": f"{{{{blob:{blob['hash'][:16]}}}}}"
     }, indent=2)
 
 
 @mcp.tool(
-    name="tmux_attach_info",
+    name="hivemind_cache_get",
     annotations={
-        "title": "Get Attach Info",
+        "title": "Get Shared Context Blob",
         "readOnlyHint": True,
         "destructiveHint": False,
         "idempotentHint": True,
         "openWorldHint": False
     }
 )
-async def tmux_attach_info(params: TmuxAttachInfoInput) -> str:
-    """Get information for attaching to a session.
-    
-    Returns the commands and info needed to attach to an agent
-    session in a terminal.
+@traced
+async def hivemind_cache_get(params: HivemindCacheGetInput) -> str:
+    """Fetch a blob from the shared context cache by hash.
     
     Args:
-        params: Session name
+        params: Blob hash (or unique prefix) and content size limit
         
     Returns:
-        JSON with attach commands and working directory
+        JSON with the blob path and content
     """
-    session_name = _get_session_name(params.name)
-    
-    if not _session_exists(session_name):
-        return json.dumps({
-            "error": f"Session '{session_name}' does not exist"
-        })
-    
-    # Get session details
-    result = _run_tmux_command([
-        "display-message",
-        "-t", session_name,
-        "-p",
-        "#{session_path}|#{pane_current_path}"
-    ])
+    try:
+        path = _cache_lookup(DEFAULT_PROJECT_DIR, params.blob_hash)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
     
-    path = DEFAULT_PROJECT_DIR
-    if result.returncode == 0 and result.stdout.strip():
-        parts = result.stdout.strip().split("|")
-        path = parts[-1] if parts else DEFAULT_PROJECT_DIR
+    data = path.read_bytes()
     
     return json.dumps({
-        "session": session_name,
-        "attach_command": f"tmux attach -t {session_name}",
-        "working_directory": path,
-        "cursor_terminal_hint": f"Run in terminal: tmux attach -t {session_name}"
+        "hash": path.name,
+        "path": str(path),
+        "bytes": len(data),
+        "truncated": len(data) > params.max_bytes,
+        "content": data[:params.max_bytes].decode("utf-8", "replace")
     }, indent=2)
 
 
 # =============================================================================
-# Hivemind File Tools
+# Worktree Tools
 # =============================================================================
 
 @mcp.tool(
-    name="hivemind_status",
+    name="hivemind_worktree_status",
     annotations={
-        "title": "Read Hivemind Status",
+        "title": "Summarize Agent Worktrees",
         "readOnlyHint": True,
         "destructiveHint": False,
         "idempotentHint": True,
         "openWorldHint": False
     }
 )
-async def hivemind_status(params: HivemindStatusInput) -> str:
-    """Read the .hivemind/STATUS.md file.
+@traced
+async def hivemind_worktree_status(params: HivemindWorktreeStatusInput) -> str:
+    """Summarize what each agent worktree has changed.
     
-    Returns the current swarm status including which agents are
-    active, idle, or blocked.
+    For every linked git worktree (e.g. squad/<name> branches under
+    .worktrees/) reports ahead/behind counts, changed files, diffstat,
+    uncommitted changes and whether the branch merges cleanly into the
+    base. Worktrees are inspected concurrently, and the committed-side
+    results are cached by HEAD and base commit so unchanged worktrees only
+    cost a git status.
     
     Args:
-        params: Project directory location
+        params: Repository location and base branch
         
     Returns:
-        Content of STATUS.md or error message
+        JSON with one summary per worktree
     """
-    project_dir = params.project_dir or DEFAULT_PROJECT_DIR
-    status_path = Path(project_dir) / ".hivemind" / "STATUS.md"
+    repo_dir = params.project_dir or DEFAULT_PROJECT_DIR
     
-    if not status_path.exists():
-        return json.dumps({
-            "error": f"STATUS.md not found at {status_path}",
-            "suggestion": "Initialize hivemind with the project first"
-        })
+    try:
+        worktrees = _list_worktrees(repo_dir)
+    except RuntimeError as e:
+        return json.dumps({"error": str(e)})
+    
+    if not worktrees:
+        return json.dumps({"worktrees": [], "count": 0})
     
-    content = status_path.read_text()
+    main, linked = worktrees[0], [w for w in worktrees[1:] if not w["bare"]]
+    base_ref = params.base_branch or main["branch"] or main["head"]
+    base = subprocess.run(
+        ["git", "rev-parse", "--verify", f"{base_ref}^{{commit}}"],
+        cwd=repo_dir,
+        capture_output=True,
+        text=True
+    )
+    if base.returncode != 0:
+        return json.dumps({"error": f"Unknown base branch '{base_ref}'"})
+    base_sha = base.stdout.strip()
+    
+    cache = _worktree_cache.setdefault(main["path"], {})
+    
+    async def summarize(worktree: Dict[str, Any]) -> Dict[str, Any]:
+        # One unreadable worktree shouldn't hide the others
+        try:
+            return await _summarize_worktree(worktree, base_ref, base_sha, params.max_files, cache)
+        except OSError as e:
+            return {"path": worktree["path"], "branch": worktree["branch"] or None, "error": str(e)}
+    
+    summaries = await asyncio.gather(*(summarize(w) for w in linked))
+    
+    # Forget worktrees that have since been removed
+    live_paths = {w["path"] for w in linked}
+    for path in list(cache):
+        if path not in live_paths:
+            del cache[path]
     
     return json.dumps({
-        "path": str(status_path),
-        "content": content
+        "base": base_ref,
+        "base_head": base_sha[:12],
+        "worktrees": list(summaries),
+        "count": len(summaries)
     }, indent=2)
 
 
+# =============================================================================
+# Trigger Tools
+# =============================================================================
+
 @mcp.tool(
-    name="hivemind_messages",
+    name="hivemind_watch",
     annotations={
-        "title": "Read Hivemind Messages",
-        "readOnlyHint": True,
+        "title": "Watch Agent Output",
+        "readOnlyHint": False,
         "destructiveHint": False,
         "idempotentHint": True,
         "openWorldHint": False
     }
 )
-async def hivemind_messages(params: HivemindMessagesInput) -> str:
-    """Read the .hivemind/MESSAGES.md file.
+@traced
+async def hivemind_watch(params: HivemindWatchInput, ctx: Context) -> str:
+    """Start or stop the output trigger engine.
     
-    Returns messages between agents and the conductor.
+    While running, every agent's pane output is streamed and matched
+    against the trigger patterns (tracebacks, rate limits, permission
+    prompts, test failures, plus any custom ones). Matches are written
+    to MESSAGES.md as ALERT entries addressed to CONDUCTOR, so there is
+    no need to poll tmux_read to notice a stalled agent.
     
     Args:
-        params: Filter options for messages
+        params: Watch settings and extra trigger patterns
         
     Returns:
-        Content of MESSAGES.md or filtered messages
+        JSON with engine state, watched sessions and alert counts
     """
-    project_dir = params.project_dir or DEFAULT_PROJECT_DIR
-    messages_path = Path(project_dir) / ".hivemind" / "MESSAGES.md"
-    
-    if not messages_path.exists():
-        return json.dumps({
-            "error": f"MESSAGES.md not found at {messages_path}",
-            "suggestion": "Initialize hivemind with the project first"
-        })
-    
-    content = messages_path.read_text()
+    if not params.enabled:
+        _triggers.stop()
+        return json.dumps({"success": True, "watching": False})
     
-    # TODO: Parse and filter messages if filter_agent or only_active specified
+    try:
+        _triggers.start(params, notify_session=ctx.session)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    _triggers._discover()
     
     return json.dumps({
-        "path": str(messages_path),
-        "content": content
+        "success": True,
+        "watching": True,
+        "sessions": sorted(set(_triggers.panes.values())),
+        "triggers": sorted(_triggers.triggers),
+        "alerts_raised": _triggers.fired,
+        "errors": _triggers.errors,
+        "last_error": _triggers.last_error,
+        "streams_dir": str(Path(_triggers.project_dir) / ".hivemind" / "streams")
     }, indent=2)
 
 
+# =============================================================================
+# Trace Tools
+# =============================================================================
+
+# Only the tail of the trace file is scanned, to keep timelines cheap
+TRACE_READ_BYTES = 8 * 1024 * 1024
+
+
+def _load_spans() -> List[Dict[str, Any]]:
+    """Read recent spans back from the trace file, flattened."""
+    path = _trace_path()
+    if not path.exists():
+        return []
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - TRACE_READ_BYTES))
+        lines = f.read().decode("utf-8", "replace").splitlines()
+    if size > TRACE_READ_BYTES:
+        lines = lines[1:]  # first line is probably cut
+    
+    spans = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        for resource in record.get("resourceSpans", []):
+            for scope in resource.get("scopeSpans", []):
+                for span in scope.get("spans", []):
+                    attrs = {}
+                    for attr in span.get("attributes", []):
+                        attrs[attr["key"]] = next(iter(attr["value"].values()), None)
+                    spans.append({
+                        "trace_id": span["traceId"],
+                        "span_id": span["spanId"],
+                        "parent_span_id": span.get("parentSpanId", ""),
+                        "name": span["name"],
+                        "start": int(span["startTimeUnixNano"]),
+                        "end": int(span["endTimeUnixNano"]),
+                        "attrs": attrs,
+                        "error": span.get("status", {}).get("message") if span.get("status", {}).get("code") == 2 else None
+                    })
+    return spans
+
+
+def _reply_latency_ms(spans: List[Dict[str, Any]], start: int) -> Optional[float]:
+    """Time from the start of a trace to the first agent reply quoting it."""
+    replies = [
+        s["start"] for s in spans
+        if s["name"] == "message.received" and s["attrs"].get("hivemind.agent", "").upper() != "CONDUCTOR"
+    ]
+    return round((min(replies) - start) / 1e6, 1) if replies else None
+
+
 @mcp.tool(
-    name="hivemind_write_message",
+    name="hivemind_trace",
     annotations={
-        "title": "Write Hivemind Message",
-        "readOnlyHint": False,
+        "title": "Trace Timeline",
+        "readOnlyHint": True,
         "destructiveHint": False,
-        "idempotentHint": False,
+        "idempotentHint": True,
         "openWorldHint": False
     }
 )
-async def hivemind_write_message(params: HivemindWriteMessageInput) -> str:
-    """Write a message to .hivemind/MESSAGES.md.
+@traced
+async def hivemind_trace(params: HivemindTraceInput) -> str:
+    """Show where time went for tool calls and the agent work they started.
     
-    Appends a new message to the messages file for agent coordination.
+    Without trace_id, lists recent traces (newest first) with their
+    duration and, when an agent has replied in MESSAGES.md quoting the
+    trace id, the latency from assignment to that reply. With trace_id,
+    returns the full span timeline of that trace (tmux, git, ollama and
+    nested tool calls), time spent per category, and related messages.
     
     Args:
-        params: Message details
+        params: Trace id or agent filter
         
     Returns:
-        Confirmation of message written
+        JSON trace list or timeline
     """
-    project_dir = params.project_dir or DEFAULT_PROJECT_DIR
-    messages_path = Path(project_dir) / ".hivemind" / "MESSAGES.md"
-    
-    if not messages_path.exists():
-        # Create the file if it doesn't exist
-        messages_path.parent.mkdir(parents=True, exist_ok=True)
-        messages_path.write_text("# MESSAGES\n\n## ACTIVE\n\n## RESOLVED\n")
-    
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-    
-    message_entry = f"""
-### [{timestamp}] {params.sender}→{params.recipient} | {params.message_type}
-**Subject:** {params.subject}
-
-{params.body}
-
----
-"""
-    
-    # Read current content
-    content = messages_path.read_text()
-    
-    # Insert after ## ACTIVE header
-    if "## ACTIVE" in content:
-        content = content.replace(
-            "## ACTIVE\n",
-            f"## ACTIVE\n{message_entry}"
-        )
-    else:
-        content += message_entry
-    
-    messages_path.write_text(content)
+    spans = _load_spans()
+    
+    if params.trace_id:
+        trace = [s for s in spans if s["trace_id"].startswith(params.trace_id)]
+        if not trace:
+            return json.dumps({"error": f"No spans found for trace '{params.trace_id}'"})
+        trace.sort(key=lambda s: s["start"])
+        start = trace[0]["start"]
+        trace_id = trace[0]["trace_id"]
+        
+        by_category: Dict[str, float] = {}
+        for s in trace:
+            if s["parent_span_id"]:
+                category = s["name"].split(" ")[0]
+                by_category[category] = by_category.get(category, 0) + (s["end"] - s["start"]) / 1e6
+        
+        with _open_store(DEFAULT_PROJECT_DIR) as conn:
+            messages = [
+                dict(row) for row in conn.execute(
+                    "SELECT timestamp, sender, recipient, message_type, subject, status "
+                    "FROM messages WHERE trace_id = ? ORDER BY id",
+                    (trace_id,)
+                )
+            ]
+        
+        return json.dumps({
+            "trace_id": trace_id,
+            "duration_ms": round((max(s["end"] for s in trace) - start) / 1e6, 1),
+            "reply_latency_ms": _reply_latency_ms(trace, start),
+            "time_by_category_ms": {k: round(v, 1) for k, v in by_category.items()},
+            "timeline": [
+                {
+                    "offset_ms": round((s["start"] - start) / 1e6, 1),
+                    "duration_ms": round((s["end"] - s["start"]) / 1e6, 1),
+                    "name": s["name"],
+                    "span_id": s["span_id"],
+                    "parent_span_id": s["parent_span_id"] or None,
+                    "attributes": s["attrs"],
+                    "error": s["error"]
+                }
+                for s in trace
+            ],
+            "messages": messages
+        }, indent=2)
+    
+    agent = _get_session_name(params.agent) if params.agent else None
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        traces.setdefault(s["trace_id"], []).append(s)
+    
+    summaries = []
+    for trace_id, trace in traces.items():
+        root = next((s for s in trace if not s["parent_span_id"] and s["name"].startswith("tool ")), None)
+        if root is None:
+            continue
+        root_agent = root["attrs"].get("hivemind.agent")
+        if agent and (not root_agent or _get_session_name(root_agent) != agent):
+            continue
+        summaries.append({
+            "trace_id": trace_id,
+            "tool": root["attrs"].get("hivemind.tool"),
+            "agent": root_agent,
+            "started": datetime.fromtimestamp(root["start"] / 1e9).strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_ms": round((root["end"] - root["start"]) / 1e6, 1),
+            "spans": len(trace),
+            "reply_latency_ms": _reply_latency_ms(trace, root["start"]),
+            "error": root["error"],
+            "_start": root["start"]
+        })
+    summaries.sort(key=lambda t: t["_start"], reverse=True)
+    for t in summaries:
+        del t["_start"]
     
     return json.dumps({
-        "success": True,
-        "message_added": {
-            "timestamp": timestamp,
-            "sender": params.sender,
-            "recipient": params.recipient,
-            "type": params.message_type,
-            "subject": params.subject
-        }
+        "path": str(_trace_path()),
+        "traces": summaries[:params.limit],
+        "count": min(len(summaries), params.limit)
     }, indent=2)
 
 
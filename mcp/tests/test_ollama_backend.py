@@ -0,0 +1,180 @@
+"""Ollama backend manager tests against a local stand-in ollama server."""
+
+import asyncio
+import json
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import hivemind_mcp as hm  # noqa: E402
+
+
+GIB = 2 ** 30
+
+
+class FakeOllama(ThreadingHTTPServer):
+    """Serves the few ollama endpoints the backend manager uses."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeOllamaHandler)
+        self.installed = {"codellama:13b": 7 * GIB, "user/model:latest": GIB}
+        self.loaded = {}
+        self.generate_calls = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    server: FakeOllama
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        models = {"/api/ps": self.server.loaded, "/api/tags": self.server.installed}
+        if self.path == "/api/version":
+            self._reply(200, {"version": "0.0.0-test"})
+        elif self.path in models:
+            self._reply(200, {"models": [
+                {"name": name, "size": size} for name, size in models[self.path].items()
+            ]})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path != "/api/generate" or payload["model"] not in self.server.installed:
+            self._reply(404, {"error": f"model '{payload.get('model')}' not found"})
+            return
+        self.server.generate_calls.append(payload)
+        self.server.loaded[payload["model"]] = self.server.installed[payload["model"]]
+        self._reply(200, {"done": True})
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(hm, "TRACE_ENABLED", False)
+    monkeypatch.setattr(hm, "_ollama_locks", {})
+    monkeypatch.setattr(hm, "_available_memory", lambda: 64 * GIB)
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    server = FakeOllama()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(hm, "OLLAMA_URL", server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _unused_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def test_status_reports_health_and_models(ollama):
+    ollama.loaded["codellama:13b"] = 7 * GIB
+    result = json.loads(asyncio.run(hm.hivemind_ollama_status(
+        hm.OllamaStatusInput(include_installed=True)
+    )))
+    assert result["healthy"] is True
+    assert result["version"] == "0.0.0-test"
+    assert result["loaded_models"] == {"codellama:13b": 7 * GIB}
+    assert set(result["installed_models"]) == {"codellama:13b", "user/model:latest"}
+
+
+def test_status_reports_unreachable_backend(monkeypatch):
+    monkeypatch.setattr(hm, "OLLAMA_URL", _unused_url())
+    result = json.loads(asyncio.run(hm.hivemind_ollama_status(hm.OllamaStatusInput())))
+    assert result["healthy"] is False
+    assert "error" in result
+
+
+def test_concurrent_warm_loads_model_once(ollama):
+    async def warm_twice():
+        return await asyncio.gather(
+            hm._ensure_ollama_model("codellama:13b"),
+            hm._ensure_ollama_model("codellama:13b")
+        )
+
+    first, second = asyncio.run(warm_twice())
+    assert first["ready"] and second["ready"]
+    assert len(ollama.generate_calls) == 1
+    assert ollama.generate_calls[0]["keep_alive"] == hm.OLLAMA_KEEP_ALIVE
+    assert {first.get("warmed"), second.get("already_loaded")} == {True}
+
+
+def test_warm_accepts_plain_and_namespaced_models(ollama):
+    result = json.loads(asyncio.run(hm.hivemind_ollama_warm(
+        hm.OllamaWarmInput(models=["user/model", "ollama/codellama:13b"])
+    )))
+    assert result["success"] is True
+    assert [m["model"] for m in result["models"]] == ["user/model:latest", "codellama:13b"]
+    assert set(ollama.loaded) == {"user/model:latest", "codellama:13b"}
+
+
+def test_warm_refuses_missing_model(ollama):
+    result = asyncio.run(hm._ensure_ollama_model("missing:7b"))
+    assert result["ready"] is False
+    assert "not installed" in result["error"]
+    assert ollama.generate_calls == []
+
+
+def test_warm_refuses_when_memory_is_short(ollama, monkeypatch):
+    monkeypatch.setattr(hm, "_available_memory", lambda: 2 * GIB)
+    result = asyncio.run(hm._ensure_ollama_model("codellama:13b"))
+    assert result["ready"] is False
+    assert "Not enough memory" in result["error"]
+    assert ollama.generate_calls == []
+
+
+def test_warm_refuses_unreachable_backend(monkeypatch):
+    monkeypatch.setattr(hm, "OLLAMA_URL", _unused_url())
+    result = asyncio.run(hm._ensure_ollama_model("codellama:13b"))
+    assert result["ready"] is False
+    assert "unreachable" in result["error"]
+
+
+def test_batch_groups_ollama_agents_by_model(ollama, monkeypatch):
+    spawned = []
+
+    async def fake_spawn(params):
+        model = hm._ollama_model_name(params.program, params.model)
+        # Ollama agents may only start once their model is resident
+        spawned.append((params.name, model is None or model in ollama.loaded))
+        return json.dumps({"success": True, "session_name": f"hive-{params.name}"})
+
+    monkeypatch.setattr(hm, "tmux_spawn", fake_spawn)
+    agents = [
+        hm.TmuxSpawnInput(name="cloud", program="claude"),
+        hm.TmuxSpawnInput(name="a", program="ollama", model="ollama/codellama:13b"),
+        hm.TmuxSpawnInput(name="b", program="aider", model="ollama_chat/codellama:13b"),
+        hm.TmuxSpawnInput(name="c", program="ollama", model="ollama/missing:7b"),
+    ]
+    result = json.loads(asyncio.run(hm.tmux_spawn_batch(hm.TmuxSpawnBatchInput(agents=agents))))
+
+    assert [name for name, _ in spawned][0] == "cloud"
+    assert sorted(spawned[1:]) == [("a", True), ("b", True)]
+    assert len(ollama.generate_calls) == 1
+    deferred = result["agents"][3]
+    assert deferred["deferred"] is True and deferred["ready"] is False
+    assert result["success"] is False